@@ -1,5 +1,7 @@
 import streamlit as st
 import pandas as pd
+from utils.shared import shared_dataset
+from utils.theme import apply_background
 
 # Page configuration
 st.set_page_config(page_title="Art of War - Welcome", layout="wide")
@@ -11,25 +13,7 @@ st.markdown(
 )
 
 # ─── GLOBAL CSS ───────────────────────────────────────────────────────
-st.markdown(
-    """
-    <style>
-    .stApp {
-      background: url('https://t4.ftcdn.net/jpg/03/49/86/71/240_F_349867133_a2Upqgg99LIDvsGbR4Of3a0bXCwqzrAQ.jpg')
-                  no-repeat center center fixed;
-      background-size: cover;
-    }
-    [data-testid="stSidebar"] {
-      background-color: rgba(0, 0, 0, 0.6);
-    }
-    .css-1lcbmhc {
-      text-align: center !important;
-      padding: 1rem !important;
-    }
-    </style>
-    """,
-    unsafe_allow_html=True,
-)
+apply_background("war_scene")
 
 # Inject custom CSS for welcome page
 st.markdown("""
@@ -119,7 +103,11 @@ st.markdown("""
 
 # Load military strength data
 def load_data():
-    return pd.read_csv("data/2024_military_strength_by_country.csv")
+    return shared_dataset(
+        "military_strength_2024",
+        columns=["country", "pwr_index", "national_annual_defense_budgets"],
+        compact=True,
+    )
 
 military_strength = load_data()
 
@@ -1,42 +1,24 @@
 import streamlit as st
-import pandas as pd
 import plotly.express as px
 import seaborn as sns
 import matplotlib.pyplot as plt
 import plotly.graph_objects as go
 import numpy as np
+from utils.shared import shared_dataset
+from utils.layout import lazy_tabs
+from utils.data_store import source_version
+from utils.figure_cache import cached_figure
+from utils.geometry import geojson_url
+from utils.theme import apply_background
 
 # ─── PAGE CONFIG ───────────────────────────────────────────────────────────────
 st.set_page_config(page_title="🌍 Military Dashboard", layout="wide")
 
 # ─── INJECT GLOBAL CSS ─────────────────────────────────────────────────────────
-st.markdown(
-    """
-    <style>
-    /* Full-screen war-scene background */
-    .stApp {
-      background: url('https://t4.ftcdn.net/jpg/03/49/86/71/240_F_349867133_a2Upqgg99LIDvsGbR4Of3a0bXCwqzrAQ.jpg')
-                  no-repeat center center fixed;
-      background-size: cover;
-    }
-    /* Translucent sidebar */
-    [data-testid="stSidebar"] {
-      background-color: rgba(0, 0, 0, 0.6);
-    }
-    /* Centered hero text */
-    .css-1lcbmhc {
-      text-align: center !important;
-      padding: 1rem !important;
-    }
-    </style>
-    """,
-    unsafe_allow_html=True,
-)
+apply_background("war_scene")
 # ─── DATA LOAD ─────────────────────────────────────────────────────────────────
-@st.cache_data
 def load_data():
-    df = pd.read_csv("data/military_data.csv")
-    return df
+    return shared_dataset("military_data", compact=True)
 
 df = load_data()
 numeric_cols = df.select_dtypes(include='number').columns.tolist()
@@ -49,16 +31,19 @@ st.markdown(
 )
 
 # ─── NAVIGATION TABS ────────────────────────────────────────────────────────────
-tabs = st.tabs([
+# Only the selected tab runs; each tab is a fragment so its widgets rerun just that tab
+TAB_LABELS = [
     "🔍 Country Profile Explorer",
     "📺 Choropleth Map",
     "📊 Compare Countries",
     "🏆 Top-N Ranking Tool",
     "🧠 Correlation Explorer"
-])
+]
+selected_tab = lazy_tabs(TAB_LABELS, key="military_strength_tab")
 
 # ─── MODULE 1: Country Profile Explorer ─────────────────────────────────────────
-with tabs[0]:
+@st.fragment
+def country_profile_tab():
     st.header("🔍 Country Profile Explorer")
 
     country = st.selectbox(
@@ -122,23 +107,30 @@ with tabs[0]:
         )
 
 # ─── MODULE 2: Choropleth Map ───────────────────────────────────────────────────
-with tabs[1]:
+@st.fragment
+def choropleth_tab():
     st.subheader("📺 Global Metric Choropleth Map")
     metric = st.selectbox("Select Metric", numeric_cols, key="choropleth_metric")
-    fig = px.choropleth(
-        df,
-        locations="country_code",
-        color=metric,
-        hover_name="country",
-        color_continuous_scale="Agsunset",
-        projection="natural earth",
-        template="plotly_dark",
-        title=f"Global Distribution of {metric}"
+    geo = geojson_url()
+    fig = cached_figure(
+        "military_strength", "choropleth", source_version("military_data"), (metric, geo),
+        lambda: px.choropleth(
+            df,
+            geojson=geo,
+            locations="iso3",
+            color=metric,
+            hover_name="country",
+            color_continuous_scale="Agsunset",
+            projection="natural earth",
+            template="plotly_dark",
+            title=f"Global Distribution of {metric}"
+        ),
     )
     st.plotly_chart(fig, use_container_width=True)
 
 # ─── MODULE 3: Compare Countries ────────────────────────────────────────────────
-with tabs[2]:
+@st.fragment
+def compare_tab():
     st.subheader("📊 Compare Countries")
     countries = st.multiselect("Select Countries", country_list, default=country_list[:5])
     metric = st.selectbox("Select Attribute to Compare", numeric_cols, key="compare_metric")
@@ -156,7 +148,8 @@ with tabs[2]:
     st.plotly_chart(fig, use_container_width=True)
 
 # ─── MODULE 4: Top-N Ranking Tool ───────────────────────────────────────────────
-with tabs[3]:
+@st.fragment
+def ranking_tab():
     st.subheader("🏆 Top-N Countries by Metric")
     metric = st.selectbox("Select Metric", numeric_cols, key="ranking_metric")
     n = st.slider("Select Top N", 5, 30, 10, key="topn_slider")
@@ -176,7 +169,8 @@ with tabs[3]:
     st.dataframe(top_df.reset_index(drop=True), use_container_width=True)
 
 # ─── MODULE 5: Correlation Explorer ─────────────────────────────────────────────
-with tabs[4]:
+@st.fragment
+def correlation_tab():
     st.markdown("## 🧠 Correlation Heatmap of Military Metrics (Interactive)")
     initial_attributes = [
         "Active Personnel", "Defense Budget", "Oil Production", "Tanks",
@@ -208,3 +202,8 @@ with tabs[4]:
         st.plotly_chart(fig, use_container_width=True)
     else:
         st.warning("Please select at least two attributes to compute the correlation matrix.")
+
+# ─── RUN SELECTED TAB ───────────────────────────────────────────────────────────
+dict(zip(TAB_LABELS, [
+    country_profile_tab, choropleth_tab, compare_tab, ranking_tab, correlation_tab
+]))[selected_tab]()
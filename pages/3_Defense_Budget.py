@@ -1,10 +1,24 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
 import numpy as np
-import matplotlib.pyplot as plt
+import warnings
+from matplotlib import colormaps
+from matplotlib.cm import ScalarMappable
+from matplotlib.colors import Normalize
+from matplotlib.figure import Figure
 from matplotlib.ticker import StrMethodFormatter
-from io import BytesIO
+from utils import derived  # noqa: F401  (registers the derived artifacts)
+from utils.data_store import BUDGET_YEARS, source_version
+from utils.figure_cache import cached_figure, cached_png
+from utils.forecast import FORECAST_END, HOLDOUT, series_forecast
+from utils.geometry import geojson_url, level_for
+from utils.layout import lazy_tabs
+from utils.shared import borrow, shared_artifact, shared_dataset
+from utils.theme import apply_background
+from utils.year_matrix import budget_matrix, top_k
 
 st.set_page_config(page_title="Defense Budget", layout="wide")
 st.title("🌍 Global Defense Budget Insights")
@@ -12,34 +26,12 @@ st.markdown("Explore patterns and trends in military spending across the globe v
 st.divider()
 
 # ─── INJECT GLOBAL CSS ─────────────────────────────────────────────────────────
-st.markdown(
-    """
-    <style>
-    /* Full-screen war-scene background */
-    .stApp {
-      background: url('https://t4.ftcdn.net/jpg/03/49/86/71/240_F_349867133_a2Upqgg99LIDvsGbR4Of3a0bXCwqzrAQ.jpg')
-                  no-repeat center center fixed;
-      background-size: cover;
-    }
-    /* Translucent sidebar */
-    [data-testid="stSidebar"] {
-      background-color: rgba(0, 0, 0, 0.6);
-    }
-    /* Centered hero text */
-    .css-1lcbmhc {
-      text-align: center !important;
-      padding: 1rem !important;
-    }
-    </style>
-    """,
-    unsafe_allow_html=True,
-)
-
-@st.cache_data
+apply_background("war_scene")
+
 def load_data():
-    """Load and validate defence-budget CSV."""
-    df = pd.read_csv("data/Cleaned_Defence_Budget.csv")
-    years = [str(y) for y in range(1960, 2021)]
+    """Borrow and validate the shared defence-budget frame."""
+    df = shared_dataset("defence_budget")
+    years = BUDGET_YEARS
     # Essential columns
     if "Country Code" not in df.columns or "Country Name" not in df.columns:
         st.error("Dataset must include 'Country Code' and 'Country Name'.")
@@ -48,73 +40,202 @@ def load_data():
     missing = [y for y in years if y not in df.columns]
     if missing:
         st.warning(f"Missing year columns: {', '.join(missing)}")
-    # Coerce numeric
-    for y in years:
-        if y in df.columns:
-            df[y] = pd.to_numeric(df[y], errors="coerce")
     return df, years
 
 df, year_columns = load_data()
+bm = budget_matrix()
+
+years_int = sorted([int(y) for y in year_columns if y.isdigit()])
 
-# Create the three horizontal tabs
-tab1, tab2, tab3 = st.tabs([
+# Create the horizontal tabs (only the selected one runs)
+TAB_LABELS = [
     "🌐 Global Spending (% of GDP)",
     "📊 Top Spenders vs India",
-    "🕰️ Decade Breakdown"
-])
+    "🕰️ Decade Breakdown",
+    "🔮 Forecast"
+]
+selected_tab = lazy_tabs(TAB_LABELS, key="defense_budget_tab")
 
 # --- Tab 1: Global Military Spending Choropleth Globe ---
-with tab1:
+def globe_figure(df_year, year, geo):
+    ystr = str(year)
+    fig = px.choropleth(
+        df_year,
+        geojson=geo,
+        locations="iso3",
+        color=ystr,
+        hover_name="Country Name",
+        hover_data={ystr: ':.2f%'},  # Format value nicely
+        projection="orthographic",
+        color_continuous_scale=px.colors.sequential.Blues,
+        range_color=(0, df_year[ystr].quantile(0.95)),
+        title=f"Defence Spending as % of GDP in {year}",
+        labels={ystr: "%GDP"}  # <-- 🛠️ This line fixes your label!
+    )
+
+    # Update layout
+    fig.update_layout(
+        margin=dict(l=10, r=10, t=50, b=10),
+        geo=dict(bgcolor='rgba(0,0,0,0)', showland=True, landcolor="rgb(217,217,217)"),
+        coloraxis_colorbar=dict(
+            title="% of GDP",
+            title_side="top",
+            ticks="outside",
+        )
+    )
+    return fig
+
+
+def year_extremes(k=5):
+    """
+    Top/bottom-``k`` spenders for every year, computed in one pass over the
+    budget matrix and shared by all sessions until the CSV changes.
+    """
+    def build():
+        parts = []
+        for year in bm.years:
+            col = bm.column(year)
+            for kind, largest in (("top", True), ("bottom", False)):
+                idx = top_k(col, k, largest=largest)
+                parts.append(pd.DataFrame({
+                    "Year": year, "kind": kind, "Country Name": bm.names[idx], "Spending (% GDP)": col[idx],
+                }))
+        return pd.concat(parts, ignore_index=True)
+    return borrow(("defense_budget", "year_extremes", k), source_version("defence_budget"), build)
+
+
+def extremes_table(extremes, year, kind):
+    sel = extremes[(extremes["Year"] == year) & (extremes["kind"] == kind)]
+    return sel.set_index("Country Name")[["Spending (% GDP)"]]
+
+
+def globe_animation(geo):
+    """
+    Every year as an animation frame of one figure (globe plus top/bottom-5
+    tables), so the year slider and play button run in the browser.
+    """
+    extremes = year_extremes()
+    fig = make_subplots(
+        rows=2, cols=2,
+        specs=[[{"type": "geo", "colspan": 2}, None], [{"type": "table"}, {"type": "table"}]],
+        row_heights=[0.72, 0.28],
+        vertical_spacing=0.04,
+    )
+
+    def year_traces(year):
+        col = bm.column(year)
+        ok = ~np.isnan(col)
+        tables = []
+        for kind in ("top", "bottom"):
+            t = extremes_table(extremes, year, kind)
+            tables.append(go.Table(
+                header=dict(values=[f"{'🔝 Top' if kind == 'top' else '🔻 Bottom'} 5 in {year}", "Spending (% GDP)"]),
+                cells=dict(values=[t.index, t["Spending (% GDP)"].round(2)]),
+            ))
+        globe = go.Choropleth(
+            geojson=geo,
+            locations=bm.codes[ok],
+            z=col[ok],
+            text=bm.names[ok],
+            coloraxis="coloraxis",
+            hovertemplate="<b>%{text}</b><br>%GDP=%{z:.2f}<extra></extra>",
+        )
+        cmax = float(np.quantile(col[ok], 0.95)) if ok.any() else 1.0
+        return [globe] + tables, cmax
+
+    frames = []
+    for year in bm.years:
+        data, cmax = year_traces(year)
+        frames.append(go.Frame(
+            name=str(year),
+            data=data,
+            traces=[0, 1, 2],
+            layout=dict(
+                coloraxis=dict(cmin=0, cmax=cmax),
+                title_text=f"Defence Spending as % of GDP in {year}",
+            ),
+        ))
+    # open on the latest year
+    last = int(bm.years[-1])
+    globe, top, bottom = frames[-1].data
+    fig.add_trace(globe, row=1, col=1)
+    fig.add_trace(top, row=2, col=1)
+    fig.add_trace(bottom, row=2, col=2)
+    fig.frames = frames
+    fig.update_geos(projection_type="orthographic", bgcolor='rgba(0,0,0,0)', showland=True, landcolor="rgb(217,217,217)")
+    fig.update_layout(
+        height=820,
+        title_text=f"Defence Spending as % of GDP in {last}",
+        margin=dict(l=10, r=10, t=50, b=10),
+        coloraxis=dict(
+            colorscale=px.colors.sequential.Blues,
+            cmin=0,
+            cmax=cmax,
+            colorbar=dict(title="% of GDP", title_side="top", ticks="outside", len=0.7, y=1, yanchor="top"),
+        ),
+        updatemenus=[dict(
+            type="buttons",
+            direction="left",
+            x=0, y=0.3, xanchor="left", yanchor="bottom",
+            buttons=[
+                dict(label="▶", method="animate",
+                     args=[None, dict(frame=dict(duration=300, redraw=True), fromcurrent=True)]),
+                dict(label="⏸", method="animate",
+                     args=[[None], dict(mode="immediate", frame=dict(duration=0, redraw=False))]),
+            ],
+        )],
+        sliders=[dict(
+            active=len(frames) - 1,
+            x=0.1, y=0.3, len=0.9, yanchor="bottom",
+            currentvalue=dict(prefix="Year: "),
+            steps=[
+                dict(label=f.name, method="animate",
+                     args=[[f.name], dict(mode="immediate", frame=dict(duration=0, redraw=True))])
+                for f in frames
+            ],
+        )],
+    )
+    return fig
+
+
+@st.fragment
+def global_spending_tab():
     st.header("🌐 Global Military Spending (% of GDP)")
-    years_int = sorted([int(y) for y in year_columns if y.isdigit()])
+    # Animated mode ships all years in one figure: scrubbing needs no reruns
+    if st.toggle("▶️ Animate all years", key="tab1_animate"):
+        geo = geojson_url(level_for(820 * 0.72))  # the globe row of the 820px figure
+        fig = cached_figure(
+            "defense_budget", "globe_animation", source_version("defence_budget"), (geo,),
+            lambda: globe_animation(geo),
+        )
+        st.plotly_chart(fig, use_container_width=True)
+        return
     year = st.slider("Select Year", min_value=years_int[0], max_value=years_int[-1], value=years_int[-1])
     ystr = str(year)
-    df_year = df[["Country Name", "Country Code", ystr]].dropna(subset=[ystr])
+    df_year = df[["Country Name", "iso3", ystr]].dropna(subset=[ystr])
 
     if df_year.empty:
         st.warning("No data for that year.")
     else:
-        fig = px.choropleth(
-            df_year,
-            locations="Country Code",
-            color=ystr,
-            hover_name="Country Name",
-            hover_data={ystr: ':.2f%'},  # Format value nicely
-            projection="orthographic",
-            color_continuous_scale=px.colors.sequential.Blues,
-            range_color=(0, df_year[ystr].quantile(0.95)),
-            title=f"Defence Spending as % of GDP in {year}",
-            labels={ystr: "%GDP"}  # <-- 🛠️ This line fixes your label!
+        geo = geojson_url()
+        fig = cached_figure(
+            "defense_budget", "globe", source_version("defence_budget"), (year, geo),
+            lambda: globe_figure(df_year, year, geo),
         )
-
-        # Update layout
-        fig.update_layout(
-            margin=dict(l=10, r=10, t=50, b=10),
-            geo=dict(bgcolor='rgba(0,0,0,0)', showland=True, landcolor="rgb(217,217,217)"),
-            coloraxis_colorbar=dict(
-                title="% of GDP",
-                title_side="top",
-                ticks="outside",
-            )
-        )
-
         st.plotly_chart(fig, use_container_width=True)
 
         st.markdown("---")
         col1, col2 = st.columns(2)
         with col1:
             st.subheader(f"🔝 Top 5 Spenders in {year}")
-            top5 = df_year.nlargest(5, ystr).set_index("Country Name")[[ystr]]
-            top5.columns = ["Spending (% GDP)"]
-            st.dataframe(top5, use_container_width=True)
+            st.dataframe(extremes_table(year_extremes(), year, "top"), use_container_width=True)
         with col2:
             st.subheader(f"🔻 Bottom 5 Spenders in {year}")
-            bot5 = df_year.nsmallest(5, ystr).set_index("Country Name")[[ystr]]
-            bot5.columns = ["Spending (% GDP)"]
-            st.dataframe(bot5, use_container_width=True)
+            st.dataframe(extremes_table(year_extremes(), year, "bottom"), use_container_width=True)
 
 # --- Tab 2: Top Spenders vs India ---
-with tab2:
+@st.fragment
+def top_spenders_tab():
     st.header("📊 Top Defence Spenders vs India")
     year = st.slider("Select Year", min_value=years_int[0], max_value=years_int[-1], value=(years_int[0]+years_int[-1])//2, key="tab2_year")
     col = str(year)
@@ -163,79 +284,108 @@ with tab2:
 
     # India’s trend over time
     st.markdown("---")
-    india_trend = (
-        df[df["Country Name"]=="India"]
-        .melt(id_vars="Country Name", value_vars=year_columns, var_name="Year", value_name="% GDP")
-        .dropna()
-    )
+    india_trend = pd.DataFrame({"Year": bm.years, "% GDP": bm.row("India")}).dropna()
     if not india_trend.empty:
         fig2 = px.line(india_trend, x="Year", y="% GDP",
                        title="India's Spending (% GDP) Over Time")
         st.plotly_chart(fig2, use_container_width=True)
 
 # --- Tab 3: Decade‐Wise Breakdown ---
-with tab3:
+def decade_hierarchy(ci):
+    """
+    Sunburst rows (1960–2020 → decade → year) for budget row ``ci``.
+
+    The hierarchy for every row (countries and regional aggregates) is
+    built in one reshape over the budget matrix, full decades only
+    (1960–2019), and shared per dataset version.
+    """
+    def build():
+        span_years, span_vals = bm.year_range(1960, 2019)
+        decade_starts, dec_sums = bm.decades(how="sum")
+        _, dec_means = bm.decades(how="mean")
+        n, n_dec = dec_sums.shape
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)  # all-NaN rows
+            root_sum = np.nansum(span_vals, axis=1)
+            root_avg = np.nanmean(span_vals, axis=1)
+
+        root = "1960–2020"
+        decade_labels = np.array([f"{start}s" for start in decade_starts], dtype=object)
+        year_labels = span_years.astype(str).astype(object)
+        # node columns: root, decades, years; then reorder to root, (decade, its years)...
+        ids = np.concatenate([[root], decade_labels, year_labels])
+        parents = np.concatenate([[""], np.repeat(root, n_dec), np.repeat(decade_labels, 10)])
+        size = np.column_stack([root_sum, dec_sums, span_vals])      # Sum is used for the hierarchy
+        color = np.column_stack([root_avg, dec_means, span_vals])    # Average for color and hover
+        order = np.concatenate([[0]] + [
+            np.r_[1 + d, 1 + n_dec + 10 * d: 1 + n_dec + 10 * (d + 1)] for d in range(n_dec)
+        ])
+        return pd.DataFrame({
+            "id": np.tile(ids[order], n),
+            "label": np.tile(ids[order], n),
+            "parent": np.tile(parents[order], n),
+            "Value": size[:, order].ravel(),
+            "%GDP": color[:, order].ravel(),
+            "ColorMetric": color[:, order].ravel(),
+        })
+
+    hierarchy = borrow(("defense_budget", "decade_hierarchy"), source_version("defence_budget"), build)
+    width = len(hierarchy) // len(bm)
+    return hierarchy.iloc[ci * width:(ci + 1) * width].reset_index(drop=True)
+
+
+def radial_figure(labels, radii):
+    """Radial bar chart of one country's yearly spending (object API, no pyplot)."""
+    angles = np.linspace(0, 2 * np.pi, len(radii), endpoint=False)
+
+    fig_r = Figure(figsize=(7, 7))
+    ax = fig_r.add_subplot(polar=True)
+
+    norm = Normalize(radii.min(), radii.max())
+    colors = colormaps["viridis"](norm(radii))
+
+    bars = ax.bar(angles, radii, width=2*np.pi/len(angles), bottom=0.0,
+                  color=colors, edgecolor="black")
+
+    ax.set_xticks([])
+    ax.set_yticklabels([])
+
+    # Place year labels slightly outside the bar
+    for angle, label in zip(angles, labels):
+        ax.plot([angle, angle], [0, max(radii) + 1], color="gray", linewidth=0.5, linestyle="--")
+
+        rotation = np.degrees(angle)
+        alignment = 'left'
+        if 90 < rotation < 270:
+            rotation += 180
+            alignment = 'right'
+
+        ax.text(angle, max(radii) + 1.5, label,
+                rotation=rotation,
+                ha=alignment,
+                va='center',
+                fontsize=9,
+                rotation_mode='anchor')
+
+    # Colorbar
+    sm = ScalarMappable(cmap="viridis", norm=norm)
+    sm.set_array([])
+    cbar = fig_r.colorbar(sm, ax=ax, pad=0.15, fraction=0.035, shrink=0.6)
+    cbar.ax.set_title('% of GDP', fontsize=10, pad=10)
+
+    fig_r.tight_layout()
+    return fig_r
+
+
+@st.fragment
+def decade_tab():
     st.header("🕰️ Decade‐Wise Defence Investment Breakdown")
 
     country = st.selectbox("Select Country", df["Country Name"].unique(), key="tab3_country")
-    sel = df[df["Country Name"] == country]
-
-    # Prepare data for sunburst
-    sunburst_data = []
-
-    # Year-wise data
-    year_values = {}
-    for start in range(1960, 2020, 10):
-        years = [str(y) for y in range(start, start + 10)]
-        for year in years:
-            year_values[year] = sel[year].values[0]
-
-    # Root node (1960–2020)
-    all_years = [sel[str(y)].values[0] for y in range(1960, 2020)]
-    root_avg = sum(all_years) / len(all_years)
-    root_sum = sum(all_years)
-
-    decade_values = {}
-    decade_averages = {}
-    for start in range(1960, 2020, 10):
-        years = [str(y) for y in range(start, start + 10)]
-        decade_label = f"{start}s"
-        values = [year_values[y] for y in years]
-        decade_values[decade_label] = sum(values)         # Sum for hierarchy
-        decade_averages[decade_label] = sum(values) / len(values)  # Average for color and hover
-
-    # Build hierarchy
-    sunburst_data.append({
-        "id": "1960–2020",
-        "label": "1960–2020",
-        "parent": "",
-        "Value": root_sum,         # Sum is used for correct hierarchy
-        "%GDP": root_avg,          # Hover and color based on average
-        "ColorMetric": root_avg
-    })
-
-    for decade_label, dec_sum in decade_values.items():
-        sunburst_data.append({
-            "id": decade_label,
-            "label": decade_label,
-            "parent": "1960–2020",
-            "Value": dec_sum,
-            "%GDP": decade_averages[decade_label],
-            "ColorMetric": decade_averages[decade_label]
-        })
-        start_year = int(decade_label[:4])
-        for y in range(start_year, start_year + 10):
-            y_str = str(y)
-            sunburst_data.append({
-                "id": y_str,
-                "label": y_str,
-                "parent": decade_label,
-                "Value": year_values[y_str],         # Use spending % for size
-                "%GDP": year_values[y_str],          # Same here for hover
-                "ColorMetric": year_values[y_str]
-            })
-
-    df_sunburst = pd.DataFrame(sunburst_data)
+    ci = bm.row_index(country)
+
+    # Precomputed for every row; picking a country is a slice
+    df_sunburst = decade_hierarchy(ci)
 
     # Sunburst Chart
     st.subheader(f"🌐 Decade-wise Defense Spending (1960–2020) – **{country}**")
@@ -271,74 +421,73 @@ with tab3:
     decade_choice = st.selectbox("Select Decade", decade_options, key="tab3_decade")
 
     if decade_choice == "1960–2020":
-        years = [str(y) for y in range(1960, 2020)]
+        start_decade, end_decade = 1960, 2019
     else:
         start_decade = int(decade_choice[:4])
-        years = [str(y) for y in range(start_decade, start_decade + 10)]
+        end_decade = start_decade + 9
 
-    trend = sel[years].T.reset_index()
-    trend.columns = ["Year", "Spending"]
-    trend["Year"] = trend["Year"].astype(int)
+    trend_years, _ = bm.year_range(start_decade, end_decade)
+    radii = bm.row(country, start_decade, end_decade)
 
-    avg_spending = trend["Spending"].mean()
+    avg_spending = np.nanmean(radii)
     st.markdown(f"### 📊 Average Spending in {decade_choice}: **{avg_spending:.2f}% of GDP**")
 
     st.subheader("🌀 Year-wise Defense Spending (Radial Bar View)")
 
     col_center = st.columns([1, 4, 1])
     with col_center[1]:
-        angles = np.linspace(0, 2 * np.pi, len(trend), endpoint=False)
-        radii = trend["Spending"].values
-        labels = trend["Year"].astype(str).tolist()
-
-        fig_r, ax = plt.subplots(figsize=(7, 7), subplot_kw=dict(polar=True))
-
-        norm = plt.Normalize(radii.min(), radii.max())
-        colors = plt.cm.viridis(norm(radii))
-
-        bars = ax.bar(angles, radii, width=2*np.pi/len(angles), bottom=0.0,
-                      color=colors, edgecolor="black")
-
-        ax.set_xticks([])
-        ax.set_yticklabels([])
-
-        # Place year labels slightly outside the bar
-        for angle, label in zip(angles, labels):
-            ax.plot([angle, angle], [0, max(radii) + 1], color="gray", linewidth=0.5, linestyle="--")
-
-            rotation = np.degrees(angle)
-            alignment = 'left'
-            if 90 < rotation < 270:
-                rotation += 180
-                alignment = 'right'
-
-            ax.text(angle, max(radii) + 1.5, label,
-                    rotation=rotation,
-                    ha=alignment,
-                    va='center',
-                    fontsize=9,
-                    rotation_mode='anchor')
-
-        # Colorbar
-        sm = plt.cm.ScalarMappable(cmap="viridis", norm=norm)
-        sm.set_array([])
-        cbar = fig_r.colorbar(sm, ax=ax, pad=0.15, fraction=0.035, shrink=0.6)
-        cbar.ax.set_title('% of GDP', fontsize=10, pad=10)
-
-        fig_r.tight_layout()
-
-        buf = BytesIO()
-        plt.savefig(buf, format="png", bbox_inches="tight")
-        st.image(buf)
-        plt.close()
+        png = cached_png(
+            "defense_budget", "radial", source_version("defence_budget"), (country, decade_choice),
+            lambda: radial_figure(trend_years.astype(str).tolist(), radii),
+            bbox_inches="tight",
+        )
+        st.image(png)
 
     st.markdown("---")
 
+# --- Tab 4: Forecast (precomputed for every row, see utils/forecast.py) ---
+def forecast_figure(country, fc):
+    """History plus forecast with its 90% band."""
+    hist = pd.DataFrame({"Year": bm.years, "% GDP": bm.row(country)}).dropna()
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=np.r_[fc["year"], fc["year"][::-1]], y=np.r_[fc["upper"], fc["lower"][::-1]],
+        fill="toself", fillcolor="rgba(255,153,51,0.2)", line=dict(width=0),
+        hoverinfo="skip", name="90% band",
+    ))
+    fig.add_trace(go.Scatter(x=hist["Year"], y=hist["% GDP"], mode="lines", name="Observed"))
+    fig.add_trace(go.Scatter(
+        x=np.r_[hist["Year"].iloc[-1:], fc["year"]], y=np.r_[hist["% GDP"].iloc[-1:], fc["forecast"]],
+        mode="lines", line=dict(dash="dash", color="#FF9933"), name="Forecast",
+    ))
+    fig.update_layout(
+        title=f"{country}: Defence Spending (% of GDP) to {FORECAST_END}",
+        xaxis_title="Year", yaxis_title="% of GDP", margin=dict(l=10, t=50),
+    )
+    return fig
+
+
+@st.fragment
+def forecast_tab():
+    st.header(f"🔮 Defence Spending Forecast to {FORECAST_END}")
+    countries = list(df["Country Name"].unique())
+    default = countries.index("India") if "India" in countries else 0
+    country = st.selectbox("Select Country", countries, index=default, key="tab4_country")
+    fc = series_forecast(shared_artifact("budget_forecast"), country)
+    if fc.empty:
+        st.warning("No forecast for that country.")
+        return
+    st.plotly_chart(forecast_figure(country, fc), use_container_width=True)
+
+    first = fc.iloc[0]
+    c1, c2, c3 = st.columns(3)
+    c1.metric(f"Forecast {int(first['year'])}", f"{first['forecast']:.2f}%")
+    c2.metric(f"Forecast {FORECAST_END}", f"{fc['forecast'].iloc[-1]:.2f}%")
+    c3.metric("Model", str(first["model"]))
+    st.caption(
+        f"Each series uses the model with the lowest mean absolute error when forecasting "
+        f"held-out {HOLDOUT}-year spans ({first['backtest_mae']:.2f} points of GDP here)."
+    )
 
-
-
-
-
-
-
-
+# --- Run the selected tab ---
+dict(zip(TAB_LABELS, [global_spending_tab, top_spenders_tab, decade_tab, forecast_tab]))[selected_tab]()
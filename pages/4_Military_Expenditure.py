@@ -2,57 +2,99 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
+from utils import derived  # noqa: F401  (registers the derived artifacts)
+from utils.data_store import load_expenditure, source_version
+from utils.forecast import FORECAST_END, series_forecast
+from utils.geometry import geojson_url
+from utils.layout import lazy_tabs
+from utils.shared import borrow, shared_artifact
+from utils.theme import apply_background
+from utils.year_matrix import expenditure_matrix, top_k
 
 # --- App config and title ---
 st.set_page_config(page_title="Military Expenditure Dashboard", layout="wide")
 st.title("🌍 Military Expenditure Visualization (1960–2018)")
 
 # ─── GLOBAL CSS ───────────────────────────────────────────────────────
-st.markdown(
-    """
-    <style>
-    .stApp {
-      background: url('https://t4.ftcdn.net/jpg/03/49/86/71/240_F_349867133_a2Upqgg99LIDvsGbR4Of3a0bXCwqzrAQ.jpg')
-                  no-repeat center center fixed;
-      background-size: cover;
-    }
-    [data-testid="stSidebar"] {
-      background-color: rgba(0, 0, 0, 0.6);
-    }
-    .css-1lcbmhc {
-      text-align: center !important;
-      padding: 1rem !important;
-    }
-    </style>
-    """,
-    unsafe_allow_html=True,
-)
+apply_background("war_scene")
 
 # --- Load & preprocess data ---
-@st.cache_data
+def _load_country_usd():
+    df = load_expenditure(
+        indicator='Military expenditure (current USD)',
+        entity_type="Country",
+    )
+    return df.reset_index()
+
 def load_data():
-    df = pd.read_excel("data/Military_Expenditure_final_rounded.xlsx")
-    df = df[df['Indicator Name'] == 'Military expenditure (current USD)']
-    df = df[df["Type"] == "Country"]
-    return df
+    return borrow("expenditure_country_usd", source_version("military_expenditure"), _load_country_usd)
 
 df = load_data()
-years_all     = [str(y) for y in range(1960, 2019)]
+# country × year matrix with prefix sums: range totals are one subtraction
+em = expenditure_matrix()
 all_countries = sorted(df['Name'].unique())
 default_countries = ['United States', 'China', 'Russian Federation']
 
-# Prepare sum_df for Top/Bottom analyses (over full range—can be reindexed per slider)
-sum_df_full = df.set_index('Name')[years_all].sum(axis=1)
+def trend_figure(rows, start, end, forecasts=None):
+    """
+    Expenditure lines (billion USD) for matrix rows over [start, end];
+    with ``forecasts`` (the precomputed store) each line continues dashed
+    to its forecast, inside a shaded 90% band.
+    """
+    years, vals = em.year_range(start, end)
+    fig = go.Figure()
+    for k, i in enumerate(rows):
+        c = em.names[i]
+        color = px.colors.qualitative.Plotly[k % len(px.colors.qualitative.Plotly)]
+        fig.add_trace(go.Scatter(
+            x=years,
+            y=vals[i] / 1e9,
+            mode='lines',              # ← markers removed
+            name=c,
+            line=dict(color=color),
+            hovertemplate=(
+                f"Country: {c}<br>"   # ← hard-code country
+                "Year: %{x}<br>"
+                "Exp: %{y:.2f} B USD<extra></extra>"
+            ),
+            hoverlabel=dict(bgcolor='black', font_color='white')
+        ))
+        fc = series_forecast(forecasts, c) if forecasts is not None else None
+        if fc is None or fc.empty:
+            continue
+        fig.add_trace(go.Scatter(
+            x=list(fc['year']) + list(fc['year'][::-1]),
+            y=list(fc['upper'] / 1e9) + list(fc['lower'][::-1] / 1e9),
+            fill='toself', fillcolor=color, opacity=0.15, line=dict(width=0),
+            hoverinfo='skip', showlegend=False,
+        ))
+        fig.add_trace(go.Scatter(
+            x=fc['year'],
+            y=fc['forecast'] / 1e9,
+            mode='lines',
+            name=f"{c} (forecast)",
+            line=dict(color=color, dash='dash'),
+            hovertemplate=(
+                f"Country: {c}<br>"
+                "Year: %{x}<br>"
+                f"Forecast ({fc['model'].iloc[0]}): %{{y:.2f}} B USD<extra></extra>"
+            ),
+            hoverlabel=dict(bgcolor='black', font_color='white')
+        ))
+    return fig
 
 # ─── TABS ─────────────────────────────────────────────────────────────
-tabs = st.tabs([
+# only the selected tab runs; each tab is a fragment
+TAB_LABELS = [
     "1️⃣ Time Series",
     "2️⃣ Top/Bottom 5",
     "3️⃣ Global Map"
-])
+]
+selected_tab = lazy_tabs(TAB_LABELS, key="expenditure_tab")
 
 # ─── Tab 1: Expenditure Over Time & Single-Year Comparison ────────────
-with tabs[0]:
+@st.fragment
+def time_series_tab():
     st.subheader("📈 Expenditure Over Time")
     countries = st.multiselect(
         "Select countries:",
@@ -63,51 +105,33 @@ with tabs[0]:
         "Select year range:",
         min_value=1960, max_value=2018, value=(1990, 2018)
     )
+    show_forecast = st.checkbox(f"Show forecast to {FORECAST_END}", key="tab1_forecast")
 
     if countries:
-        df_sel = (
-            df[df['Name'].isin(countries)]
-            [['Name'] + years_all]
-            .set_index('Name')
-            .T
-            .astype(float)
-        )
-        df_sel.index = df_sel.index.astype(int)
-        df_sel = df_sel.loc[year_range[0] : year_range[1]]
-
-        fig = go.Figure()
-        for c in df_sel.columns:
-            fig.add_trace(go.Scatter(
-                x=df_sel.index,
-                y=df_sel[c] / 1e9,
-                mode='lines',              # ← markers removed
-                name=c,
-                hovertemplate=(
-                    f"Country: {c}<br>"   # ← hard-code country
-                    "Year: %{x}<br>"
-                    "Exp: %{y:.2f} B USD<extra></extra>"
-                ),
-                hoverlabel=dict(bgcolor='black', font_color='white')
-            ))
+        rows = sorted(em.row_index(c) for c in countries)
+        sel_years, _ = em.year_range(year_range[0], year_range[1])
+        forecasts = shared_artifact("expenditure_forecast") if show_forecast else None
+        last_tick = FORECAST_END if show_forecast else year_range[1]
 
+        fig = trend_figure(rows, year_range[0], year_range[1], forecasts)
         fig.update_layout(
             template='plotly_dark',
             xaxis=dict(
                 title='Year',
                 tickmode='array',
-                tickvals=[y for y in df_sel.index if y % 5 == 0]
+                tickvals=[y for y in range(year_range[0], last_tick + 1) if y % 5 == 0]
             ),
             yaxis=dict(title='Expenditure (Billion USD)')
         )
         st.plotly_chart(fig, use_container_width=True)
 
         st.subheader("📊 Single-Year Comparison")
-        year = st.selectbox("Select a year:", options=df_sel.index[::-1])
-        values = (df_sel.loc[year] / 1e9)
+        year = st.selectbox("Select a year:", options=sel_years[::-1])
+        values = em.column(year)[rows] / 1e9
 
         fig2 = go.Figure(go.Bar(
-            x=values.index,
-            y=values.values,
+            x=em.names[rows],
+            y=values,
             marker_color='skyblue',
             hovertemplate="Country: %{x}<br>Exp: %{y:.2f} B USD<extra></extra>",
             hoverlabel=dict(bgcolor='black', font_color='white')
@@ -120,17 +144,18 @@ with tabs[0]:
         st.plotly_chart(fig2, use_container_width=True)
 
 # ─── Tab 2: Top/Bottom 5 Spenders ──────────────────────────────────────
-with tabs[1]:
+@st.fragment
+def top_bottom_tab():
     st.subheader("💰 Top/Bottom 5 Spenders")
     range_tb = st.slider(
         "Select range for Top/Bottom analysis:",
         min_value=1960, max_value=2018, value=(1960, 2018)
     )
-    cols_tb = [str(y) for y in range(range_tb[0], range_tb[1] + 1)]
-    sum_df = df.set_index('Name')[cols_tb].sum(axis=1)
-
-    top5 = sum_df.nlargest(5)
-    bot5 = sum_df[sum_df > 0].nsmallest(5)
+    totals = em.range_sum(range_tb[0], range_tb[1])
+    top_rows = top_k(totals, 5)
+    bot_rows = top_k(totals, 5, largest=False, where=totals > 0)
+    top5 = pd.Series(totals[top_rows], index=em.names[top_rows])
+    bot5 = pd.Series(totals[bot_rows], index=em.names[bot_rows])
 
     # Top/Bottom side by side
     col1, col2 = st.columns(2)
@@ -160,26 +185,7 @@ with tabs[1]:
 
     # Full-width Trends, with country-name injected
     st.subheader("📈 Trends of Top 5 Spenders Over Time")
-    df_top_trend = (
-        df[df['Name'].isin(top5.index)][['Name'] + cols_tb]
-        .set_index('Name').T
-    )
-    df_top_trend.index = df_top_trend.index.astype(int)
-
-    fig_top_trend = go.Figure()
-    for country in df_top_trend.columns:
-        fig_top_trend.add_trace(go.Scatter(
-            x=df_top_trend.index,
-            y=df_top_trend[country] / 1e9,
-            mode='lines',
-            name=country,
-            hovertemplate=(
-                f"Country: {country}<br>"
-                "Year: %{x}<br>"
-                "Exp: %{y:.2f} B USD<extra></extra>"
-            ),
-            hoverlabel=dict(bgcolor='black', font_color='white')
-        ))
+    fig_top_trend = trend_figure(sorted(top_rows), range_tb[0], range_tb[1])
     fig_top_trend.update_layout(
         template='plotly_dark',
         xaxis_title='Year',
@@ -188,26 +194,7 @@ with tabs[1]:
     st.plotly_chart(fig_top_trend, use_container_width=True)
 
     st.subheader("📈 Trends of Bottom 5 Spenders Over Time")
-    df_bot_trend = (
-        df[df['Name'].isin(bot5.index)][['Name'] + cols_tb]
-        .set_index('Name').T
-    )
-    df_bot_trend.index = df_bot_trend.index.astype(int)
-
-    fig_bot_trend = go.Figure()
-    for country in df_bot_trend.columns:
-        fig_bot_trend.add_trace(go.Scatter(
-            x=df_bot_trend.index,
-            y=df_bot_trend[country] / 1e9,
-            mode='lines',
-            name=country,
-            hovertemplate=(
-                f"Country: {country}<br>"
-                "Year: %{x}<br>"
-                "Exp: %{y:.2f} B USD<extra></extra>"
-            ),
-            hoverlabel=dict(bgcolor='black', font_color='white')
-        ))
+    fig_bot_trend = trend_figure(sorted(bot_rows), range_tb[0], range_tb[1])
     fig_bot_trend.update_layout(
         template='plotly_dark',
         xaxis_title='Year',
@@ -216,22 +203,23 @@ with tabs[1]:
     st.plotly_chart(fig_bot_trend, use_container_width=True)
 
 # ─── Tab 3: Global Choropleth Map ─────────────────────────────────────
-with tabs[2]:
+@st.fragment
+def map_tab():
     st.subheader("🗺 Global Map View")
     year_map = st.slider(
         "Select map year:",
         min_value=1960, max_value=2018, value=2018
     )
     map_df = (
-        df[['Name', str(year_map)]]
+        df[['Name', 'iso3', str(year_map)]]
         .rename(columns={str(year_map): 'Value'})
     )
-    map_df = map_df[map_df['Value'] > 0]
+    map_df = map_df[(map_df['Value'] > 0) & map_df['iso3'].notna()]
 
     fig_map = px.choropleth(
         map_df,
-        locations='Name',
-        locationmode='country names',
+        geojson=geojson_url(),
+        locations='iso3',
         color='Value',
         color_continuous_scale='YlOrRd',
         projection='orthographic',
@@ -239,7 +227,7 @@ with tabs[2]:
         hover_data={'Value': ':.2f'}
     )
     fig_map.update_traces(
-        hovertemplate="Country: %{location}<br>Value: %{z:.2f} USD<extra></extra>",
+        hovertemplate="Country: %{hovertext}<br>Value: %{z:.2f} USD<extra></extra>",
         hoverlabel=dict(bgcolor='black', font_color='white')
     )
     fig_map.update_layout(
@@ -247,3 +235,6 @@ with tabs[2]:
         margin=dict(l=0, r=0, t=30, b=0)
     )
     st.plotly_chart(fig_map, use_container_width=True)
+
+# ─── RUN SELECTED TAB ─────────────────────────────────────────────────
+dict(zip(TAB_LABELS, [time_series_tab, top_bottom_tab, map_tab]))[selected_tab]()
@@ -1,6 +1,7 @@
 import streamlit as st
-import pandas as pd
 import plotly.express as px
+from utils.shared import shared_dataset, writable
+from utils.theme import apply_background
 
 st.set_page_config(page_title="Trade Balance Analysis", layout="wide")
 st.title("Trade Balance Analysis")
@@ -11,28 +12,7 @@ st.markdown(
 )        
 
 # ─── INJECT GLOBAL CSS ─────────────────────────────────────────────────────────
-st.markdown(
-    """
-    <style>
-    /* Full-screen war-scene background */
-    .stApp {
-      background: url('https://t4.ftcdn.net/jpg/03/49/86/71/240_F_349867133_a2Upqgg99LIDvsGbR4Of3a0bXCwqzrAQ.jpg')
-                  no-repeat center center fixed;
-      background-size: cover;
-    }
-    /* Translucent sidebar */
-    [data-testid="stSidebar"] {
-      background-color: rgba(0, 0, 0, 0.6);
-    }
-    /* Centered hero text */
-    .css-1lcbmhc {
-      text-align: center !important;
-      padding: 1rem !important;
-    }
-    </style>
-    """,
-    unsafe_allow_html=True,
-)
+apply_background("war_scene")
 
 
 # Custom CSS for popups and styling
@@ -187,8 +167,10 @@ body {
 """, unsafe_allow_html=True)
 
 # Load data first
-trade_df = pd.read_csv("data/exports_imports_cleaned.csv")
-events_df = pd.read_csv("data/trade_events_updated2.csv", encoding="latin-1")
+def load_data():
+    return shared_dataset("trade"), shared_dataset("trade_events")
+
+trade_df, events_df = load_data()
 
 # Initialize session state for both popups and selected year
 if 'show_popup' not in st.session_state:
@@ -209,7 +191,7 @@ with col2:
     selected_country = st.selectbox("", options=sorted(trade_df["country"].unique()), index=0, help="Choose a country to view its trade balance trends")
 
 # Filter trade data for selected country and add a 'year' column
-country_trade_df = trade_df[trade_df['country'] == selected_country].copy()
+country_trade_df = writable(trade_df[trade_df['country'] == selected_country])
 country_trade_df['year'] = country_trade_df['financial_year(start)'].astype(int)
 
 # Bar Chart: Trade Balance Over Time
@@ -420,7 +402,7 @@ compare_countries = st.multiselect(
 
 if compare_countries:
     # Build a small DataFrame with year, country, export & import
-    comp_df = trade_df[trade_df["country"].isin(compare_countries)].copy()
+    comp_df = writable(trade_df[trade_df["country"].isin(compare_countries)])
     comp_df["year"] = comp_df["financial_year(start)"].astype(int)
 
     # Exports timeline
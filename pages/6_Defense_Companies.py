@@ -1,69 +1,27 @@
 import streamlit as st
-import pandas as pd
 import plotly.express as px
+from utils import artifacts, derived  # noqa: F401  (registers the derived artifacts)
+from utils.data_store import source_path
+from utils.figure_cache import cached_figure
+from utils.layout import lazy_tabs
+from utils.shared import shared_artifact
+from utils.theme import apply_background
 
 st.set_page_config(page_title="Defense Revenue Insights", layout="wide")
 
 # ─── INJECT GLOBAL CSS ─────────────────────────────────────────────────────────
-st.markdown(
-    """
-    <style>
-    /* Full-screen war-scene background */
-    .stApp {
-      background: url('https://t4.ftcdn.net/jpg/03/49/86/71/240_F_349867133_a2Upqgg99LIDvsGbR4Of3a0bXCwqzrAQ.jpg')
-                  no-repeat center center fixed;
-      background-size: cover;
-    }
-    /* Translucent sidebar */
-    [data-testid="stSidebar"] {
-      background-color: rgba(0, 0, 0, 0.6);
-    }
-    /* Centered hero text */
-    .css-1lcbmhc {
-      text-align: center !important;
-      padding: 1rem !important;
-    }
-    </style>
-    """,
-    unsafe_allow_html=True,
-)
+apply_background("war_scene")
 
-@st.cache_data
-def load_data():
+# Company names are normalised/de-duplicated and the per-year rankings are
+# precomputed as build artifacts (utils/derived.py); they are rebuilt only
+# when the source CSV changes.
+def load_data(name="companies"):
     try:
-        df = pd.read_csv("data/updated_defense_companies_2005_2020.csv")
+        return shared_artifact(name)
     except FileNotFoundError:
-        st.error("Data file not found at data/updated_defense_companies_2005_2020.csv")
+        st.error(f"Data file not found at {source_path('defence_companies')}")
         st.stop()
 
-    # ─── NORMALIZE COMPANY NAMES ────────────────────────────────────────────────
-    # 1. trim whitespace
-    df["Company"] = df["Company"].str.strip()
-
-    # 2. drop trailing numbers
-    df["Company"] = df["Company"].str.replace(r"\d+$", "", regex=True)
-
-    # 3. replace punctuation (hyphens, slashes, periods, commas) with space
-    df["Company"] = df["Company"].str.replace(r"[^\w\s]", " ", regex=True)
-
-    # 4. collapse multiple spaces into one
-    df["Company"] = df["Company"].str.replace(r"\s+", " ", regex=True)
-
-    # 5. lowercase then title-case
-    df["Company"] = df["Company"].str.lower().str.title()
-
-    # ─── OPTIONAL: FUZZY-MAP NEAR-DUPLICATES ────────────────────────────────────
-    # (requires Python stdlib difflib)
-    from difflib import get_close_matches
-    cleaned = {}
-    for name in df["Company"].unique():
-        # try to match against already-accepted names
-        match = get_close_matches(name, cleaned.values(), n=1, cutoff=0.85)
-        cleaned[name] = match[0] if match else name
-    df["Company"] = df["Company"].map(cleaned)
-
-    return df
-
 # Load dataset
 df = load_data()
 all_companies = sorted(df["Company"].unique())
@@ -72,22 +30,13 @@ year_selected = df["Year"].max()
 # App title
 st.title("💼 Defense Companies Analysis (2005–2020)")
 
-# Create horizontal tabs
-tab1, tab2, tab3, tab4 = st.tabs(["Animations", "Trend", "Sunburst", "Bubble"])
+# Create horizontal tabs (only the selected one runs; each is a fragment)
+TAB_LABELS = ["Animations", "Trend", "Sunburst", "Bubble"]
+selected_tab = lazy_tabs(TAB_LABELS, key="companies_tab")
 
-with tab1:
-    st.subheader("🎞️ Animated Top Companies by Defense Revenue (2005–2020)")
-    top_n = st.slider("Top N Countries", min_value=5, max_value=30, value=10, key="top_n_anim")
-    # Animated bar chart: top N by revenue each year
-    top_countries_over_time = (
-        df.groupby(["Year", "Country"])["Defense_Revenue_From_A_Year_Ago"]
-        .sum()
-        .reset_index()
-        .sort_values(by=["Year", "Defense_Revenue_From_A_Year_Ago"], ascending=[True, False])
-        .groupby("Year")
-        .apply(lambda x: x.head(top_n))
-        .reset_index(drop=True)
-    )
+def revenue_race(top_n):
+    country_revenue = load_data("company_country_revenue")
+    top_countries_over_time = country_revenue[country_revenue["rank"] <= top_n]
     max_revenue = top_countries_over_time["Defense_Revenue_From_A_Year_Ago"].max()
     fig1 = px.bar(
         top_countries_over_time,
@@ -105,19 +54,11 @@ with tab1:
         yaxis={'categoryorder': 'total ascending'},
         margin=dict(t=40, l=0, r=0, b=0)
     )
-    st.plotly_chart(fig1, use_container_width=True)
+    return fig1
 
-    st.subheader("🎞️ Animated Total Number of Companies by Country (2005–2020)")
-    # Animated bar chart: count of companies per country each year
-    company_count = (
-        df.groupby(["Year", "Country"])["Company"]
-        .nunique()
-        .reset_index(name="Count")
-        .sort_values(by=["Year", "Count"], ascending=[True, False])
-        .groupby("Year")
-        .apply(lambda x: x.head(top_n))
-        .reset_index(drop=True)
-    )
+def count_race(top_n):
+    country_counts = load_data("company_country_counts")
+    company_count = country_counts[country_counts["rank"] <= top_n]
     max_count = company_count["Count"].max()
     fig2 = px.bar(
         company_count,
@@ -135,9 +76,30 @@ with tab1:
         yaxis={'categoryorder': 'total ascending'},
         margin=dict(t=40, l=0, r=0, b=0)
     )
+    return fig2
+
+# Animated figures are cached per (artifact version, widget values), shared by all sessions
+@st.fragment
+def animations_tab():
+    st.subheader("🎞️ Animated Top Companies by Defense Revenue (2005–2020)")
+    top_n = st.slider("Top N Countries", min_value=5, max_value=30, value=10, key="top_n_anim")
+    # Animated bar chart: top N by revenue each year
+    fig1 = cached_figure(
+        "defense_companies", "revenue_race", artifacts.key("company_country_revenue"), (top_n,),
+        lambda: revenue_race(top_n),
+    )
+    st.plotly_chart(fig1, use_container_width=True)
+
+    st.subheader("🎞️ Animated Total Number of Companies by Country (2005–2020)")
+    # Animated bar chart: count of companies per country each year
+    fig2 = cached_figure(
+        "defense_companies", "count_race", artifacts.key("company_country_counts"), (top_n,),
+        lambda: count_race(top_n),
+    )
     st.plotly_chart(fig2, use_container_width=True)
 
-with tab2:
+@st.fragment
+def trend_tab():
     st.subheader("📈 Defense Revenue Trend (2005–2020)")
     selected_companies = st.multiselect(
         "Select Companies for Trend", all_companies, key="trend_sel"
@@ -162,7 +124,8 @@ with tab2:
     )
     st.plotly_chart(fig_trend, use_container_width=True)
 
-with tab3:
+@st.fragment
+def sunburst_tab():
     st.subheader("🌞 Interactive Sunburst: Country → Company")
     col1, col2 = st.columns(2)
     with col1:
@@ -192,9 +155,9 @@ with tab3:
         .reset_index()
     )
     top_entries = (
-        sunburst_data.groupby("Country").apply(
-            lambda x: x.nlargest(num_companies, "Defense_Revenue_From_A_Year_Ago")
-        ).reset_index(drop=True)
+        sunburst_data.sort_values("Defense_Revenue_From_A_Year_Ago", ascending=False)
+        .groupby("Country").head(num_companies)
+        .reset_index(drop=True)
     )
     top_entries["World"] = "World"
     fig_sun = px.sunburst(
@@ -214,22 +177,8 @@ with tab3:
     with st.expander("📄 View Raw Data"):
         st.dataframe(df_year)
 
-with tab4:
-    st.subheader("🎥 Animated Bubble Chart: Company Evolution (2005–2020)")
-    top_n_bubble = st.slider(
-        "Top N Companies per Year (for animation)",
-        5, 30, 15,
-        key="bubble_n"
-    )
-    anim_df = (
-        df.groupby(["Year","Company","Country"], as_index=False)
-        .agg({
-            "Defense_Revenue_From_A_Year_Ago": "sum",
-            "Total Revenue": "sum",
-            "%of Revenue from Defence": "mean"
-        })
-    )
-    anim_df["rank"] = anim_df.groupby("Year")["Defense_Revenue_From_A_Year_Ago"].rank("dense", ascending=False)
+def bubble_figure(top_n_bubble):
+    anim_df = load_data("company_evolution")
     anim_df = anim_df[anim_df["rank"] <= top_n_bubble]
     fig_bubble = px.scatter(
         anim_df,
@@ -249,8 +198,25 @@ with tab4:
         },
     )
     fig_bubble.update_layout(margin=dict(t=40, l=0, r=0, b=0))
+    return fig_bubble
+
+@st.fragment
+def bubble_tab():
+    st.subheader("🎥 Animated Bubble Chart: Company Evolution (2005–2020)")
+    top_n_bubble = st.slider(
+        "Top N Companies per Year (for animation)",
+        5, 30, 15,
+        key="bubble_n"
+    )
+    fig_bubble = cached_figure(
+        "defense_companies", "bubble", artifacts.key("company_evolution"), (top_n_bubble,),
+        lambda: bubble_figure(top_n_bubble),
+    )
     st.plotly_chart(fig_bubble, use_container_width=True)
 
+# Run the selected tab
+dict(zip(TAB_LABELS, [animations_tab, trend_tab, sunburst_tab, bubble_tab]))[selected_tab]()
+
 # Footer
 st.markdown(
     """
@@ -1,9 +1,16 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-from sklearn.preprocessing import StandardScaler
-from sklearn.linear_model import LinearRegression
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+from utils import artifacts, derived  # noqa: F401  (registers the derived artifacts)
+from utils.derived import STRENGTH_METRICS
+from utils.figure_cache import cached_png
+from utils.forecast import FORECAST_END
+from utils.montecarlo import DEFAULT_NOISE, simulate
+from utils.projection import DEFAULT_PENALTY, DEFAULT_TARGET, METRIC_LABELS, projection
+from utils.sensitivity import sensitivity
+from utils.shared import shared_artifact
+from utils.theme import apply_background
 
 # Page configuration
 st.set_page_config(page_title="Top Military Powers Prediction 2047", layout="wide")
@@ -11,123 +18,139 @@ st.set_page_config(page_title="Top Military Powers Prediction 2047", layout="wid
 st.title("Top Military Powers Prediction for 2047")
 
 # ─── INJECT GLOBAL CSS ─────────────────────────────────────────────────────────
-st.markdown(
-    """
-    <style>
-    .stApp {
-      background: url('https://t4.ftcdn.net/jpg/03/49/86/71/240_F_349867133_a2Upqgg99LIDvsGbR4Of3a0bXCwqzrAQ.jpg')
-                  no-repeat center center fixed;
-      background-size: cover;
-    }
-    [data-testid="stSidebar"] {
-      background-color: rgba(0, 0, 0, 0.6);
-    }
-    .css-1lcbmhc {
-      text-align: center !important;
-      padding: 1rem !important;
-    }
-    </style>
-    """,
-    unsafe_allow_html=True,
-)
+apply_background("war_scene")
 
-# Load data
-@st.cache_data
-def load_data():
-    ms = pd.read_csv("data/2024_military_strength_by_country.csv")
-    db = pd.read_csv("data/Cleaned_Defence_Budget.csv")
-    return ms, db
-
-military_strength, defense_budget = load_data()
-
-def create_strength_score(df):
-    metrics = [
-        'total_national_populations',
-        'active_service_military_manpower',
-        'total_military_aircraft_strength',
-        'total_combat_tank_strength',
-        'navy_strength',
-        'national_annual_defense_budgets',
-        'purchasing_power_parities'
-    ]
-    for m in metrics:
-        if m in df.columns:
-            df[m] = pd.to_numeric(df[m], errors='coerce')
-    df_clean = df.dropna(subset=[m for m in metrics if m in df.columns])
-    scaler = StandardScaler()
-    scaled = scaler.fit_transform(df_clean[metrics])
-    sdf = pd.DataFrame(scaled, columns=metrics)
-    sdf['strength_score'] = sdf.mean(axis=1)
-    sdf['country'] = df_clean['country'].values
-    sdf['pwr_index'] = pd.to_numeric(df_clean['pwr_index'], errors='coerce')
-    return sdf.sort_values('strength_score', ascending=False)
-
-def analyze_growth_trajectory(strength_df, budget_df):
-    growth = []
-    for c in strength_df['country']:
-        subset = budget_df[budget_df['Country Name'] == c]
-        years = [str(y) for y in range(2000, 2021) if str(y) in subset.columns]
-        if subset.empty or len(years) < 5:
-            growth.append(0)
-        else:
-            vals = subset[years].values.flatten().astype(float)
-            idx = np.arange(len(vals))[~np.isnan(vals)].reshape(-1,1)
-            y = vals[~np.isnan(vals)]
-            model = LinearRegression().fit(idx, y)
-            growth.append(model.coef_[0])
-    strength_df['growth_slope'] = growth
-    gs = strength_df['growth_slope']
-    strength_df['growth_norm'] = (gs - gs.min())/(gs.max()-gs.min() + 1e-9)
-    return strength_df
-
-def predict_future(df, target_year=2047):
-    years_proj = target_year - 2024
-    df['projected_strength'] = df['strength_score'] + df['growth_norm'] * (years_proj / 5)
-    df['projection_score'] = df['projected_strength'] - 0.1 * df['pwr_index']
-    return df.sort_values('projection_score', ascending=False)
+# Scenario (projections are cached per parameter set, see utils/projection.py)
+with st.expander("⚙️ Scenario settings"):
+    c1, c2 = st.columns(2)
+    target_year = c1.slider("Target year", min_value=2025, max_value=2060, value=DEFAULT_TARGET)
+    penalty = c2.slider("Power-index penalty", min_value=0.0, max_value=0.5, value=DEFAULT_PENALTY, step=0.01)
+    st.caption("Metric weights (relative; equal weights give the plain mean z-score)")
+    wcols = st.columns(len(STRENGTH_METRICS))
+    weights = tuple(
+        col.number_input(METRIC_LABELS[m], min_value=0.0, max_value=10.0, value=1.0, step=0.25, key=f"w_{m}")
+        for col, m in zip(wcols, STRENGTH_METRICS)
+    )
+if sum(weights) == 0:
+    st.warning("At least one metric needs a non-zero weight.")
+    st.stop()
 
 # Select top N
 top_n = st.slider("Select how many top countries to display", min_value=5, max_value=30, value=10)
 
-# Run predictions
-with st.spinner("Calculating predictions..."):
-    strength = create_strength_score(military_strength)
-    strength = analyze_growth_trajectory(strength, defense_budget)
-    future = predict_future(strength)
+future = projection(weights, target_year, penalty)
 
 # Display current vs predicted
 col1, col2 = st.columns(2)
 with col1:
     st.subheader(f"Current Top {top_n} Military Powers (2024)")
-    cur = strength[['country','strength_score']].head(top_n).rename(columns={'country':'Country','strength_score':'Strength Score'})
+    cur = future.nsmallest(top_n, 'current_rank')[['country','strength_score']].rename(columns={'country':'Country','strength_score':'Strength Score'})
     st.table(cur)
 with col2:
-    st.subheader(f"Predicted Top {top_n} Military Powers (2047)")
+    st.subheader(f"Predicted Top {top_n} Military Powers ({target_year})")
     pred = future[['country','projection_score']].head(top_n).rename(columns={'country':'Country','projection_score':'Projection Score'})
     st.table(pred)
 
 # Show rank changes
-st.subheader(f"Changes in Rankings (2024 → 2047)")
-
-cr = {c:i+1 for i,c in enumerate(cur['Country'])}
-pr = {c:i+1 for i,c in enumerate(pred['Country'])}
-changes=[]
-for c in set(list(cr.keys())+list(pr.keys())):
-    changes.append({'Country':c,'2024':cr.get(c,top_n+10),'2047':pr.get(c,top_n+10)})
-chg_df = pd.DataFrame(changes)
-
-fig, ax = plt.subplots(figsize=(8,6))
-for _, r in chg_df.iterrows():
-    ax.plot([1, 2], [r['2024'], r['2047']], '-', alpha=0.3)
-ax.scatter([1]*len(chg_df), chg_df['2024'], s=80, label='2024')
-ax.scatter([2]*len(chg_df), chg_df['2047'], s=80, label='2047')
-for _, r in chg_df.iterrows():
-    ax.text(0.8, r['2024'], r['Country'], ha='right')
-    ax.text(2.1, r['2047'], r['Country'], ha='left')
-ax.set_xticks([1, 2])
-ax.set_xticklabels(['2024', '2047'])
-ax.set_ylim(top_n + 5, 0)
-ax.set_ylabel('Rank')
-ax.legend()
-st.pyplot(fig)
+st.subheader(f"Changes in Rankings (2024 → {target_year})")
+
+def rank_change_figure(cur, pred, top_n, target_year):
+    """Slope chart of rank changes (object API, no pyplot)."""
+    cr = {c:i+1 for i,c in enumerate(cur['Country'])}
+    pr = {c:i+1 for i,c in enumerate(pred['Country'])}
+    changes=[]
+    for c in dict.fromkeys(list(cr.keys())+list(pr.keys())):
+        changes.append({'Country':c,'2024':cr.get(c,top_n+10),'target':pr.get(c,top_n+10)})
+    chg_df = pd.DataFrame(changes)
+
+    fig = Figure(figsize=(8,6))
+    ax = fig.add_subplot()
+    for _, r in chg_df.iterrows():
+        ax.plot([1, 2], [r['2024'], r['target']], '-', alpha=0.3)
+    ax.scatter([1]*len(chg_df), chg_df['2024'], s=80, label='2024')
+    ax.scatter([2]*len(chg_df), chg_df['target'], s=80, label=str(target_year))
+    for _, r in chg_df.iterrows():
+        ax.text(0.8, r['2024'], r['Country'], ha='right')
+        ax.text(2.1, r['target'], r['Country'], ha='left')
+    ax.set_xticks([1, 2])
+    ax.set_xticklabels(['2024', str(target_year)])
+    ax.set_ylim(top_n + 5, 0)
+    ax.set_ylabel('Rank')
+    ax.legend()
+    return fig
+
+png = cached_png(
+    "predictions", "rank_changes", artifacts.key("growth_trajectory"),
+    (top_n, weights, target_year, penalty),
+    lambda: rank_change_figure(cur, pred, top_n, target_year),
+    bbox_inches="tight", dpi=200,
+)
+st.image(png, use_container_width=True)
+
+# Budget outlook (precomputed forecasts, see utils/forecast.py)
+outlook_year = min(target_year, FORECAST_END)
+st.subheader(f"📈 Defence Budget Outlook ({outlook_year})")
+budget_fc = shared_artifact("budget_forecast")
+fc_year = budget_fc[(budget_fc['year'] == outlook_year) & budget_fc['iso3'].notna()]  # skip regional aggregates
+outlook = fc_year.set_index(fc_year['iso3'].astype(object)).reindex(future['iso3'].head(top_n).astype(object))
+band = outlook['lower'].map('{:.2f}'.format) + '–' + outlook['upper'].map('{:.2f}'.format)
+st.dataframe(
+    pd.DataFrame({
+        'Country': pred['Country'].to_numpy(),
+        'Budget (% GDP)': outlook['forecast'].to_numpy(),
+        '90% Band': band.where(outlook['lower'].notna(), '').to_numpy(),
+        'Model': outlook['model'].astype(object).to_numpy(),
+    }),
+    hide_index=True, use_container_width=True,
+    column_config={'Budget (% GDP)': st.column_config.NumberColumn(format="%.2f")},
+)
+st.caption("Each country's budget series is forecast by the model that did best on held-out years; "
+           "countries without a budget series are left blank.")
+
+# Weight sensitivity (exact stable ranges per weight, see utils/sensitivity.py)
+st.subheader("🎚️ Weight Sensitivity")
+if st.toggle("Show how far each weight can move before a ranking changes"):
+    basis = st.radio("Ranking", ["Current strength", f"Projected {target_year}"], horizontal=True)
+    sens = sensitivity(weights, target_year=None if basis == "Current strength" else target_year, penalty=penalty)
+    top = sens.head(top_n)
+
+    def weight_range(m):
+        lo, hi = top[f"{m}_low"], top[f"{m}_high"]
+        return lo.map('{:.2f}'.format) + '–' + hi.map(lambda v: '∞' if np.isinf(v) else f'{v:.2f}')
+
+    table = pd.DataFrame({
+        'Country': top['country'],
+        'Rank': top['rank'],
+        **{METRIC_LABELS[m]: weight_range(m) for m in STRENGTH_METRICS},
+        'Most Sensitive To': top['tightest'].map(METRIC_LABELS),
+        'Margin': top['margin'].where(np.isfinite(top['margin'])),  # inf: no single weight moves it
+    })
+    st.dataframe(
+        table, hide_index=True, use_container_width=True,
+        column_config={'Margin': st.column_config.ProgressColumn(format="%.3f", min_value=0.0, max_value=float(max(table['Margin'].max(), 1e-9)))},
+    )
+    st.caption("Each metric column is the range that weight can take, with the others fixed, before the "
+               "country's position changes. Margin is the smallest such move as a share of the total weight "
+               "(blank when no single weight can change the position).")
 
+# Uncertainty (Monte Carlo over budget trends and metric noise, see utils/montecarlo.py)
+st.subheader("🎲 Ranking Uncertainty")
+if st.toggle("Simulate uncertainty in the projection"):
+    c1, c2, c3 = st.columns(3)
+    samples = c1.select_slider("Scenarios", options=[1000, 5000, 20000], value=1000)
+    noise = c2.slider("Metric noise (std. dev.)", min_value=0.0, max_value=0.5, value=DEFAULT_NOISE, step=0.05)
+    seed = c3.number_input("Seed", min_value=0, max_value=2**31 - 1, value=0, step=1)
+    with st.spinner("Simulating scenarios…"):
+        mc = simulate(samples, seed=seed, weights=weights, target_year=target_year,
+                      penalty=penalty, metric_noise=noise, top=top_n)
+    band = mc.head(top_n).assign(interval=lambda d: d['rank_low'].astype(str) + '–' + d['rank_high'].astype(str))
+    st.dataframe(
+        band[['country', 'median_rank', 'interval', 'p_top', 'mean_score', 'score_sd']].rename(columns={
+            'country': 'Country', 'median_rank': 'Median Rank', 'interval': '90% Rank Interval',
+            'p_top': f'P(Top {top_n})', 'mean_score': 'Mean Score', 'score_sd': 'Score Std. Dev.',
+        }),
+        hide_index=True, use_container_width=True,
+        column_config={f'P(Top {top_n})': st.column_config.ProgressColumn(format="%.2f", min_value=0.0, max_value=1.0)},
+    )
+    st.caption(f"{mc.attrs['samples']:,} scenarios: budget trends refitted on bootstrapped residuals, "
+               "standardised metrics perturbed by Gaussian noise.")
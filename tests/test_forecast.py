@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils import forecast
+from utils.year_matrix import YearMatrix
+
+YEARS = np.arange(1990, 2021)
+
+
+def test_align_right_aligns_and_fills_gaps():
+    values = np.array([
+        [1.0, np.nan, 3.0, 4.0, np.nan],
+        [np.nan, 2.0, 4.0, np.nan, np.nan],
+        [np.nan] * 5,
+    ])
+    y, last, n = forecast.align(values)
+    np.testing.assert_array_equal(last, [3, 2, -1])
+    np.testing.assert_array_equal(n, [4, 2, 0])
+    np.testing.assert_array_equal(y[0], [np.nan, 1.0, 2.0, 3.0, 4.0])
+    np.testing.assert_array_equal(y[1], [np.nan, np.nan, np.nan, 2.0, 4.0])
+    assert np.isnan(y[2]).all()
+
+
+def test_linear_model_extends_a_line():
+    y = np.array([2.0 + 0.5 * np.arange(30), 10.0 - np.arange(30)])
+    np.testing.assert_allclose(forecast.linear(y, 3), [[17.0, 17.5, 18.0], [-20.0, -21.0, -22.0]])
+
+
+def test_piecewise_follows_the_last_segment():
+    x = np.arange(30, dtype=float)
+    y = np.where(x < 18, 5.0 + x, 23.0 - 2.0 * (x - 18))[None]
+    np.testing.assert_allclose(forecast.piecewise(y, 2), [[-1.0, -3.0]], atol=1e-8)
+
+
+def test_forecast_matrix_picks_an_exact_model_and_serial_matches_pool():
+    t = YEARS - YEARS[0]
+    values = np.vstack([
+        100.0 + 3.0 * t,                                    # straight line
+        np.where(t < 12, 50.0 + t, 62.0 - 2.0 * (t - 12)),  # change point seen by both origins
+        np.full(len(t), 7.0),                               # flat
+    ])
+    values[0, :5] = np.nan                                  # starts later
+    matrix = YearMatrix(["line", "kink", "flat"], YEARS, values, codes=["AAA", "BBB", "CCC"])
+    serial = forecast.forecast_matrix(matrix, end=2025, workers=1)
+    pooled = forecast.forecast_matrix(matrix, end=2025, workers=2)
+    pd.testing.assert_frame_equal(serial, pooled)
+
+    by_name = serial.set_index(["name", "year"])
+    assert set(serial["year"]) == set(range(2021, 2026))
+    np.testing.assert_allclose(by_name.loc["line", "forecast"], 100.0 + 3.0 * np.arange(31, 36))
+    np.testing.assert_allclose(by_name.loc["kink", "forecast"], 62.0 - 2.0 * np.arange(19, 24), atol=1e-6)
+    np.testing.assert_allclose(by_name.loc["flat", "forecast"], 7.0)
+    assert (serial["backtest_mae"] < 1e-6).all()
+    assert (serial["lower"] <= serial["forecast"]).all() and (serial["forecast"] <= serial["upper"]).all()
+
+
+def test_forecast_matrix_log_scale_and_floor():
+    growth = 1000.0 * 1.05 ** (YEARS - YEARS[0])
+    shrink = 10.0 - 0.5 * (YEARS - YEARS[0])     # crosses zero: non-positive years are dropped
+    matrix = YearMatrix(["growth", "shrink"], YEARS, np.vstack([growth, shrink]))
+    df = forecast.forecast_matrix(matrix, log=True, floor=0.0, end=2022, workers=1)
+    grown = df[df["name"] == "growth"]
+    np.testing.assert_allclose(grown["forecast"], growth[-1] * 1.05 ** np.array([1, 2]), rtol=1e-6)
+    assert (df[["forecast", "lower", "upper"]] >= 0).all().all()
+
+
+def test_nothing_to_forecast():
+    matrix = YearMatrix(["a"], YEARS, np.ones((1, len(YEARS))))
+    with pytest.raises(ValueError):
+        forecast.forecast_matrix(matrix, end=2020, workers=1)
@@ -0,0 +1,31 @@
+import pandas as pd
+import pytest
+
+from utils import montecarlo
+
+
+@pytest.fixture
+def fresh_runs():
+    montecarlo.clear()
+    yield
+    montecarlo.clear()
+    montecarlo._pool.clear()  # shuts the workers down
+
+
+def test_pool_matches_in_process(fresh_runs, monkeypatch):
+    samples = montecarlo.CHUNK * montecarlo.POOL_MIN_CHUNKS  # just enough chunks for the pool
+    serial = montecarlo.simulate(samples, seed=7, workers=1)
+    montecarlo.clear()
+    # spawned workers import their own copy, so only an in-process fallback would hit this
+    monkeypatch.setattr(montecarlo, "simulate_chunk", lambda *args: pytest.fail("ran in-process"))
+    pooled = montecarlo.simulate(samples, seed=7, workers=2)
+    pd.testing.assert_frame_equal(serial, pooled)
+    assert pooled.attrs["samples"] == samples
+
+
+def test_extending_a_run_matches_a_fresh_one(fresh_runs):
+    montecarlo.simulate(montecarlo.CHUNK, seed=3, workers=1)
+    extended = montecarlo.simulate(3 * montecarlo.CHUNK, seed=3, workers=1)
+    montecarlo.clear()
+    fresh = montecarlo.simulate(3 * montecarlo.CHUNK, seed=3, workers=1)
+    pd.testing.assert_frame_equal(extended, fresh)
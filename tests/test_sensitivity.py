@@ -0,0 +1,66 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from utils import projection, sensitivity
+from utils.projection import _ranks
+
+METRICS = ["a", "b", "c"]
+
+# scores with weights (1, 1, 0): A = 2, B = 1.5, C = 1
+Z = np.array([
+    [4.0, 0.0, 0.0],
+    [0.0, 3.0, 3.0],
+    [1.0, 1.0, 0.0],
+])
+
+
+@pytest.fixture
+def toy(monkeypatch):
+    monkeypatch.setattr(projection, "STRENGTH_METRICS", METRICS)
+    monkeypatch.setattr(sensitivity, "STRENGTH_METRICS", METRICS)
+    monkeypatch.setattr(sensitivity, "model", lambda: SimpleNamespace(
+        z=Z, countries=np.array(["A", "B", "C"], dtype=object),
+        iso3=np.array(["AAA", "BBB", "CCC"], dtype=object), offset=None,
+    ))
+
+
+def test_crossing_weights_match_the_closed_form(toy):
+    down, up = sensitivity.weight_stability(Z, [1.0, 1.0, 0.0])
+    # B overtakes A once c reaches 1/3: (0 + 3 + 3/3) / (7/3) == 4 / (7/3)
+    assert up[0, 2] == pytest.approx(1 / 3)
+    assert down[1, 0] == pytest.approx(0.25)   # a at 0.75: A and B both score 3 / 1.75
+    assert up[1, 0] == pytest.approx(1.0)      # a at 2: C catches B
+    assert down[1, 1] == pytest.approx(0.5)
+    assert down[1, 2] == pytest.approx(1 / 3)  # would need c = -1/3
+    assert np.isinf(down[0, 2])                # A and C do not depend on c
+    w = np.array([1.0, 1.0, 1 / 3])
+    s = Z @ w / w.sum()
+    assert s[0] == pytest.approx(s[1])
+
+
+def test_zero_weight_is_not_a_rank_change(toy):
+    df = sensitivity.sensitivity([1.0, 1.0, 0.0])
+    assert list(df["country"]) == ["A", "B", "C"]
+    np.testing.assert_allclose(df["margin"], [0.125, 0.125, 0.25])
+    assert list(df["tightest"]) == ["a", "a", "b"]
+    np.testing.assert_allclose(df["c_low"], 0.0)
+    np.testing.assert_allclose(df["c_high"], [1 / 3, 1 / 3, np.inf])
+
+
+def test_rank_changes_just_past_each_bound(toy):
+    rng = np.random.default_rng(1)
+    z = rng.normal(size=(8, 3))
+    w = np.array([1.0, 2.0, 0.5])
+    down, up = sensitivity.weight_stability(z, w)
+    base = _ranks(z @ w)
+    for i in range(len(z)):
+        for k in range(z.shape[1]):
+            for d in (up[i, k], -down[i, k]):
+                if not np.isfinite(d) or w[k] + 1.001 * d < 0:  # no crossing at a valid weight
+                    continue
+                for frac, same in ((0.999, True), (1.001, False)):
+                    moved = w.copy()
+                    moved[k] += frac * d
+                    assert (_ranks(z @ moved)[i] == base[i]) == same, (i, k, d, frac)
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from utils.trends import fit_trends
+
+
+@pytest.fixture
+def series():
+    rng = np.random.default_rng(0)
+    x = np.arange(2000, 2021, dtype=float)
+    values = 3.0 + 0.05 * (x - 2000) + rng.normal(0, 0.3, (12, len(x)))
+    values[rng.random(values.shape) < 0.2] = np.nan   # gaps
+    values[3, :-2] = np.nan                           # two points: no standard errors
+    values[3, -2:] = [4.0, 4.2]
+    values[4] = np.nan                                # no points at all
+    values[5, :] = 1.5                                # constant: no R²
+    return x, values
+
+
+def test_matches_polyfit_per_row(series):
+    x, values = series
+    fit = fit_trends(x, values)
+    for i, y in enumerate(values):
+        ok = ~np.isnan(y)
+        assert fit.n[i] == ok.sum()
+        if ok.sum() < 2:
+            assert np.isnan(fit.slope[i]) and np.isnan(fit.intercept[i])
+            continue
+        slope, intercept = np.polyfit(x[ok], y[ok], 1)
+        np.testing.assert_allclose([fit.slope[i], fit.intercept[i]], [slope, intercept], rtol=1e-9, atol=1e-9)
+        if ok.sum() > 2:
+            coef, cov = np.polyfit(x[ok], y[ok], 1, cov=True)
+            np.testing.assert_allclose(
+                [fit.slope_se[i], fit.intercept_se[i]], np.sqrt(np.diag(cov)), rtol=1e-7, atol=1e-12,
+            )
+            resid = y[ok] - np.polyval(coef, x[ok])
+            syy = ((y[ok] - y[ok].mean()) ** 2).sum()
+            if syy > 0:
+                np.testing.assert_allclose(fit.r2[i], 1 - (resid ** 2).sum() / syy, rtol=1e-9)
+        else:
+            assert np.isnan(fit.slope_se[i])
+
+
+def test_constant_row_has_zero_slope_and_no_r2(series):
+    x, values = series
+    fit = fit_trends(x, values)
+    assert fit.slope[5] == pytest.approx(0.0, abs=1e-12)
+    assert fit.intercept[5] == pytest.approx(1.5)
+    assert np.isnan(fit.r2[5])
+
+
+def test_min_points(series):
+    x, values = series
+    fit = fit_trends(x, values, min_points=3)
+    assert np.isnan(fit.slope[3]) and fit.n[3] == 2
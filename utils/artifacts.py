@@ -0,0 +1,178 @@
+"""
+Tiny build system for derived tables.
+
+Each artifact declares the raw datasets (``utils.data_store`` names) and the
+other artifacts it is computed from. Its key is a hash of its code (the
+source of the module defining it and of every ``utils`` module that module
+imports, transitively), the content hashes of those datasets and the keys
+of its dependencies, so fixing a helper rebuilds what uses it. Results
+are persisted as Parquet under ``data/.store/artifacts/``, named by their
+key (``<name>.<key>.parquet``), and rebuilt only when the key changes, so
+refreshing one CSV invalidates just the artifacts downstream of it. The
+file name is the only record of freshness: there is no shared manifest for
+concurrent builds (threads or processes) to race on.
+
+Reading a fresh artifact takes no lock; a build locks only its own name,
+so one session building a slow artifact does not hold up the others.
+
+Artifacts are registered with :func:`artifact` (see :mod:`utils.derived`)
+and read with :func:`get`. Rebuild everything that is stale with::
+
+    python -m utils.artifacts
+"""
+import hashlib
+import inspect
+import json
+import os
+import sys
+import threading
+from collections import namedtuple
+from functools import lru_cache
+from pathlib import Path
+from types import ModuleType
+
+import pandas as pd
+
+from utils.data_store import STORE_DIR, atomic_write, source_path, source_version
+
+ARTIFACT_DIR = STORE_DIR / "artifacts"
+
+Artifact = namedtuple("Artifact", ["name", "fn", "sources", "deps", "code"])
+
+PACKAGE = __name__.split(".")[0] + "."
+
+REGISTRY = {}
+_keys = {}  # name -> (file stamp, key)
+_locks = {}  # name -> build lock
+_locks_lock = threading.Lock()
+
+
+def artifact(name, sources=(), deps=(), code=()):
+    """
+    Register ``fn`` as artifact ``name``. ``fn`` receives the dependency
+    artifacts as keyword arguments (in ``deps`` order) and returns a frame.
+    ``code`` lists further modules or functions whose source is part of the
+    key, beyond what is found from the defining module's imports.
+    """
+    def register(fn):
+        REGISTRY[name] = Artifact(name, fn, tuple(sources), tuple(deps), tuple(code))
+        return fn
+    return register
+
+
+def _local_modules(obj):
+    """The module defining ``obj`` and every ``utils`` module it imports, transitively."""
+    found = {}
+    stack = [obj if isinstance(obj, ModuleType) else inspect.getmodule(obj)]
+    while stack:
+        mod = stack.pop()
+        if mod is None or mod.__name__ in found or not mod.__name__.startswith(PACKAGE):
+            continue
+        found[mod.__name__] = mod
+        for value in vars(mod).values():
+            if isinstance(value, ModuleType):
+                stack.append(value)
+            elif isinstance(getattr(value, "__module__", None), str):
+                stack.append(sys.modules.get(value.__module__))
+    return found
+
+
+def _stat(path):
+    st_ = os.stat(path)
+    return st_.st_mtime_ns, st_.st_size
+
+
+@lru_cache(maxsize=None)
+def _file_digest(path, stamp):
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+
+@lru_cache(maxsize=None)
+def _code_files(a):
+    modules = {}
+    for obj in (a.fn, *a.code):
+        modules.update(_local_modules(obj))
+    return {n: inspect.getsourcefile(m) for n, m in sorted(modules.items())}
+
+
+def _stamp(name):
+    """File stats of everything an artifact's key is computed from."""
+    a = REGISTRY[name]
+    return (
+        tuple((f, _stat(f)) for f in _code_files(a).values()),
+        tuple(_stat(source_path(s)) for s in a.sources),
+        tuple(_stamp(d) for d in a.deps),
+    )
+
+
+def key(name):
+    """
+    Content key for an artifact: changes iff its inputs or code change.
+    Memoised per process until one of the underlying files changes.
+    """
+    stamp = _stamp(name)
+    hit = _keys.get(name)
+    if hit is not None and hit[0] == stamp:
+        return hit[1]
+    a = REGISTRY[name]
+    payload = {
+        "code": {m: _file_digest(f, _stat(f)) for m, f in _code_files(a).items()},
+        "sources": {s: source_version(s) for s in a.sources},
+        "deps": {d: key(d) for d in a.deps},
+    }
+    k = hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+    _keys[name] = (stamp, k)
+    return k
+
+
+def _path(name, k):
+    return ARTIFACT_DIR / f"{name}.{k[:16]}.parquet"
+
+
+def _build_lock(name):
+    with _locks_lock:
+        return _locks.setdefault(name, threading.Lock())
+
+
+def is_stale(name):
+    return not _path(name, key(name)).exists()
+
+
+def get(name, force=False):
+    """Return an artifact, rebuilding it (and stale dependencies) if needed."""
+    path = _path(name, key(name))
+    if not force and path.exists():
+        return pd.read_parquet(path)
+    # dependencies are built under their own locks; artifacts form a DAG, so
+    # locks are always taken parent before child and cannot deadlock
+    with _build_lock(name):
+        if not force and path.exists():  # another session built it meanwhile
+            return pd.read_parquet(path)
+        a = REGISTRY[name]
+        result = a.fn(**{d: get(d) for d in a.deps})
+        ARTIFACT_DIR.mkdir(parents=True, exist_ok=True)
+        atomic_write(path, lambda p: result.to_parquet(p))
+        # older keys, and the unkeyed file of the former manifest layout
+        for stale in [*ARTIFACT_DIR.glob(f"{name}.*.parquet"), ARTIFACT_DIR / f"{name}.parquet"]:
+            if stale != path:
+                stale.unlink(missing_ok=True)
+        return result
+
+
+def build_all(force=False):
+    """Rebuild every stale artifact; returns the names that were rebuilt."""
+    rebuilt = []
+    for name in REGISTRY:
+        if force or is_stale(name):
+            get(name, force=True)
+            rebuilt.append(name)
+    return rebuilt
+
+
+if __name__ == "__main__":
+    # go through the package module so the registry is the one derived.py fills
+    from utils import artifacts, derived  # noqa: F401
+
+    rebuilt = set(artifacts.build_all())
+    for name in artifacts.REGISTRY:
+        print(f"{name:<32} {'rebuilt' if name in rebuilt else 'fresh'}")
@@ -0,0 +1,216 @@
+"""
+Basemap for the pydeck maps.
+
+By default the maps use a remote Mapbox style (``BASEMAP_STYLE``, satellite
+streets), which needs a Mapbox token, network access and a tile request per
+pan. Pointing ``BASEMAP_TILES`` at a raster MBTiles or PMTiles file (or
+placing one at ``data/basemap.mbtiles``) switches to local tiles:
+
+* the tileset is extracted once into ``static/tiles/<name>-<key>/z/x/y.<ext>``,
+  keyed by the file's size and mtime, so replacing the file rebuilds it and
+  the browser never sees stale tiles under an old URL,
+* Streamlit serves those files directly (``server.enableStaticServing``),
+* the deck gets an inline style with one raster source pointing there, and
+  tiles above the tileset's max zoom are over-zoomed client-side.
+
+In local mode the map needs no token and requests nothing from third
+parties, provided deck.gl and mapbox-gl (1.x, which needs no token for
+non-Mapbox sources) come from this server too: ``st.pydeck_chart`` uses
+the copies bundled in Streamlit and :mod:`utils.deck_animation` serves
+pydeck's bundle from ``static/deck/``. ``Deck.to_html`` would load both
+from CDNs.
+
+Pre-extract with ``python -m utils.basemap``. PMTiles support needs the
+optional ``pmtiles`` package. Vector tilesets are not supported (they would
+need a full style document), only PNG/JPEG/WebP tiles.
+"""
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import threading
+from io import BytesIO
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import streamlit as st
+from PIL import Image
+
+from utils.data_store import DATA_DIR
+from utils.theme import STATIC_DIR
+
+try:
+    from pmtiles.reader import MmapSource, Reader, all_tiles
+    from pmtiles.tile import Compression, TileType
+except ImportError:  # pmtiles is optional
+    Reader = None
+
+TILE_DIR = STATIC_DIR / "tiles"
+STATIC_URL = "app/static/tiles"
+DEFAULT_TILES = DATA_DIR / "basemap.mbtiles"
+REMOTE_STYLE = os.environ.get("BASEMAP_STYLE", "mapbox://styles/mapbox/satellite-streets-v11")
+BACKGROUND = "#0b1d2a"  # shown where the tileset has no coverage
+
+FORMATS = {"png": "png", "jpg": "jpg", "jpeg": "jpg", "webp": "webp"}
+
+_lock = threading.Lock()
+
+
+def tiles_path():
+    """The configured local tileset, or ``None`` for the remote style."""
+    path = os.environ.get("BASEMAP_TILES")
+    if path:
+        return Path(path).expanduser().resolve()
+    return DEFAULT_TILES if DEFAULT_TILES.exists() else None
+
+
+# ─── READERS ───────────────────────────────────────────────────────────────────
+def _read_mbtiles(path):
+    """``(metadata, tiles)`` with tiles as ``((z, x, y), bytes)`` in XYZ order."""
+    con = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    meta = dict(con.execute("SELECT name, value FROM metadata"))
+    fmt = meta.get("format", "png").lower()
+    if fmt not in FORMATS:
+        con.close()
+        raise ValueError(f"{path.name}: {fmt} tiles are not supported, only raster tilesets")
+
+    def tiles():
+        try:
+            rows = con.execute("SELECT zoom_level, tile_column, tile_row, tile_data FROM tiles")
+            for z, x, row, data in rows:
+                yield (z, x, (1 << z) - 1 - row), data  # MBTiles rows are TMS (flipped)
+        finally:
+            con.close()
+
+    return {
+        "format": fmt,
+        "minzoom": int(meta.get("minzoom", 0)),
+        "maxzoom": int(meta.get("maxzoom", 22)),
+        "bounds": [float(v) for v in meta["bounds"].split(",")] if meta.get("bounds") else None,
+        "attribution": meta.get("attribution", ""),
+    }, tiles()
+
+
+def _read_pmtiles(path):
+    if Reader is None:
+        raise ImportError("reading .pmtiles needs the 'pmtiles' package")
+    f = open(path, "rb")
+    get_bytes = MmapSource(f)
+    reader = Reader(get_bytes)
+    header, meta = reader.header(), reader.metadata()
+    kinds = {TileType.PNG: "png", TileType.JPEG: "jpg", TileType.WEBP: "webp"}
+    compressed = header["tile_compression"] not in (Compression.NONE, Compression.UNKNOWN)
+    if header["tile_type"] not in kinds or compressed:
+        f.close()
+        raise ValueError(f"{path.name}: only uncompressed raster tilesets are supported")
+
+    def tiles():
+        try:
+            yield from all_tiles(get_bytes)
+        finally:
+            f.close()
+
+    return {
+        "format": kinds[header["tile_type"]],
+        "minzoom": header["min_zoom"],
+        "maxzoom": header["max_zoom"],
+        "bounds": [header[k] / 1e7 for k in ("min_lon_e7", "min_lat_e7", "max_lon_e7", "max_lat_e7")],
+        "attribution": meta.get("attribution", ""),
+    }, tiles()
+
+
+# ─── TILE CACHE ────────────────────────────────────────────────────────────────
+def _cache_key(path):
+    st_ = path.stat()
+    return hashlib.sha256(f"{path}|{st_.st_size}|{st_.st_mtime_ns}".encode()).hexdigest()[:12]
+
+
+def build_tiles(path):
+    """
+    Extract ``path`` into the static tile cache (once per file version) and
+    return its TileJSON-like description.
+    """
+    out = TILE_DIR / f"{path.stem}-{_cache_key(path)}"
+    tilejson = out / "tileset.json"
+    with _lock:
+        if tilejson.exists():
+            return json.loads(tilejson.read_text())
+        read = _read_pmtiles if path.suffix == ".pmtiles" else _read_mbtiles
+        meta, tiles = read(path)
+        ext = FORMATS[meta["format"]]
+        tmp = out.with_name(f"{out.name}.{os.getpid()}.tmp")
+        shutil.rmtree(tmp, ignore_errors=True)
+        tile_size = None
+        for (z, x, y), data in tiles:
+            if tile_size is None:
+                with Image.open(BytesIO(data)) as im:
+                    tile_size = im.width
+            target = tmp / str(z) / str(x) / f"{y}.{ext}"
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.write_bytes(data)
+        tmp.mkdir(parents=True, exist_ok=True)
+        meta.update(tile_size=tile_size or 256, template=f"{out.name}/{{z}}/{{x}}/{{y}}.{ext}")
+        (tmp / "tileset.json").write_text(json.dumps(meta, indent=2))
+        # older extractions of the same file are no longer referenced
+        for stale in TILE_DIR.glob(f"{path.stem}-*"):
+            if stale != tmp:
+                shutil.rmtree(stale, ignore_errors=True)
+        os.replace(tmp, out)
+        return meta
+
+
+@st.cache_resource(show_spinner="Preparing map tiles…")
+def _tileset(path, key):
+    return build_tiles(path)
+
+
+# ─── DECK ARGUMENTS ────────────────────────────────────────────────────────────
+def _static_root():
+    """Absolute URL of ``app/static/`` for the current session (relative outside one)."""
+    url = st.context.url
+    base = (st.get_option("server.baseUrlPath") or "").strip("/")
+    if not url:
+        return f"./{STATIC_URL}"
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}/{base + '/' if base else ''}{STATIC_URL}"
+
+
+def local_style(tileset):
+    """Inline Mapbox GL style showing ``tileset`` as a single raster layer."""
+    source = {
+        "type": "raster",
+        "tiles": [f"{_static_root()}/{tileset['template']}"],
+        "tileSize": tileset["tile_size"],
+        "minzoom": tileset["minzoom"],
+        "maxzoom": tileset["maxzoom"],
+        "attribution": tileset["attribution"],
+    }
+    if tileset["bounds"]:
+        source["bounds"] = tileset["bounds"]
+    return {
+        "version": 8,
+        "sources": {"basemap": source},
+        "layers": [
+            {"id": "background", "type": "background", "paint": {"background-color": BACKGROUND}},
+            {"id": "basemap", "type": "raster", "source": "basemap"},
+        ],
+    }
+
+
+def deck_kwargs():
+    """``pdk.Deck`` keyword arguments for the configured basemap."""
+    path = tiles_path()
+    if path is None:
+        return {"map_style": REMOTE_STYLE}
+    # pydeck only accepts an inline style document with the mapbox provider
+    return {"map_provider": "mapbox", "map_style": local_style(_tileset(path, _cache_key(path)))}
+
+
+if __name__ == "__main__":
+    path = tiles_path()
+    if path is None:
+        print(f"No local tileset: set BASEMAP_TILES or add {DEFAULT_TILES.relative_to(DATA_DIR.parent)}")
+    else:
+        meta = build_tiles(path)
+        print(f"{path.name} -> static/tiles/{meta['template'].split('/')[0]} (z{meta['minzoom']}-{meta['maxzoom']})")
@@ -0,0 +1,102 @@
+"""
+Compact in-memory representation for the wide military tables.
+
+``compact()`` shrinks a frame without changing any value:
+
+* formatted numbers stored as text ("4,435,000") are parsed; a text column
+  is only converted when some value has a thousands separator, and never
+  when a value has a leading zero, so codes such as "00123" stay text,
+* integers (and integral floats without NaN) are downcast to the smallest
+  signed type that holds them,
+* other floats become float32 only when that round-trips exactly,
+* repeated strings become categoricals,
+* optionally, zero-dominated numeric columns use sparse storage (only when
+  that is actually smaller than the downcast dense column).
+
+The before/after footprint is kept in ``df.attrs["memory"]``. Print it for
+every dataset with::
+
+    python -m utils.compact
+"""
+import numpy as np
+import pandas as pd
+
+# "4,435,000" or a plain number without leading zeros ("0.5" is fine, "0123" is not)
+FORMATTED_NUMBER = r"-?[1-9]\d{0,2}(,\d{3})+(\.\d+)?|-?(0|[1-9]\d*)(\.\d+)?"
+CATEGORY_RATIO = 0.5
+SPARSE_ZERO_RATIO = 0.6
+
+
+def memory_bytes(df):
+    return int(df.memory_usage(deep=True, index=True).sum())
+
+
+def _parse_formatted(col):
+    s = col.dropna().astype(str)
+    if s.empty or not s.str.contains(",", regex=False).any() or not s.str.fullmatch(FORMATTED_NUMBER).all():
+        return col
+    return pd.to_numeric(col.str.replace(",", "", regex=False), errors="coerce")
+
+
+def _downcast(col):
+    if pd.api.types.is_bool_dtype(col):
+        return col
+    if pd.api.types.is_float_dtype(col):
+        vals = col.to_numpy()
+        if np.isfinite(vals).all() and np.array_equal(vals, np.round(vals)):
+            return pd.to_numeric(col.astype(np.int64), downcast="integer")
+        as32 = vals.astype(np.float32)
+        if np.array_equal(as32.astype(np.float64), vals, equal_nan=True):
+            return col.astype(np.float32)
+        return col
+    if pd.api.types.is_integer_dtype(col):
+        return pd.to_numeric(col, downcast="integer")
+    return col
+
+
+def compact(df, sparse=False, category_ratio=CATEGORY_RATIO, sparse_zero_ratio=SPARSE_ZERO_RATIO):
+    """Return a memory-compact copy of ``df`` (values are unchanged)."""
+    before = memory_bytes(df)
+    out = {}
+    for name, col in df.items():
+        if pd.api.types.is_string_dtype(col) or col.dtype == object:
+            col = _parse_formatted(col)
+        if pd.api.types.is_numeric_dtype(col):
+            col = _downcast(col)
+            if sparse and len(col) and (col == 0).mean() >= sparse_zero_ratio:
+                as_sparse = col.astype(pd.SparseDtype(col.dtype, 0))
+                if as_sparse.memory_usage(index=False) < col.memory_usage(index=False):
+                    col = as_sparse
+        elif (pd.api.types.is_string_dtype(col) or col.dtype == object) and len(col):
+            if col.nunique(dropna=True) <= category_ratio * len(col):
+                col = col.astype("category")
+        out[name] = col
+    result = pd.DataFrame(out, index=df.index)
+    result.attrs["memory"] = {"before": before, "after": memory_bytes(result)}
+    return result
+
+
+def memory_report(frames):
+    """Before/after footprint for ``{name: compacted frame}``."""
+    rows = []
+    for name, df in frames.items():
+        mem = df.attrs.get("memory", {"before": memory_bytes(df), "after": memory_bytes(df)})
+        rows.append({
+            "dataset": name,
+            "before_kb": mem["before"] / 1024,
+            "after_kb": mem["after"] / 1024,
+            "saved_pct": 100 * (1 - mem["after"] / mem["before"]) if mem["before"] else 0.0,
+        })
+    return pd.DataFrame(rows).set_index("dataset").round(1)
+
+
+if __name__ == "__main__":
+    from utils.data_store import load
+
+    for sparse in (False, True):
+        frames = {
+            name: compact(load(name), sparse=sparse)
+            for name in ("military_strength_2024", "military_data")
+        }
+        print(f"sparse={sparse}")
+        print(memory_report(frames).to_string(), end="\n\n")
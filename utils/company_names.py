@@ -0,0 +1,148 @@
+"""
+Company-name normalisation and near-duplicate resolution.
+
+Names are matched against the canonical names accepted so far, like
+``difflib.get_close_matches`` with the same 0.85 cutoff, but candidates come
+from a character-trigram inverted index instead of a scan over every
+accepted name. Only names sharing enough trigrams (and of compatible length)
+are scored with ``SequenceMatcher``, which keeps matching close to linear for
+tens of thousands of names.
+
+The resolved alias table is persisted under ``data/.store/`` and reused, so
+a refreshed contractor list only matches the names it has not seen before.
+The table is versioned by this module's source: changing the clean-up or
+the matcher starts a fresh table.
+"""
+import hashlib
+import threading
+from collections import Counter, defaultdict
+from difflib import SequenceMatcher
+from pathlib import Path
+
+import pandas as pd
+
+from utils.data_store import STORE_DIR, atomic_write
+
+CUTOFF = 0.85
+MAX_CANDIDATES = 25
+VERSION = hashlib.sha256(Path(__file__).read_bytes()).hexdigest()[:12]
+
+_lock = threading.Lock()
+
+
+def normalize(names):
+    """Vectorised clean-up of raw company names (a Series in, a Series out)."""
+    return (
+        names.str.strip()
+        # drop trailing footnote numbers ("Lockheed Martin 1")
+        .str.replace(r"\d+$", "", regex=True)
+        # hyphens, slashes, periods, commas -> space
+        .str.replace(r"[^\w\s]", " ", regex=True)
+        .str.replace(r"\s+", " ", regex=True)
+        .str.strip()
+        .str.lower()
+        .str.title()
+    )
+
+
+def _trigrams(name):
+    padded = f"  {name.lower()} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class NameIndex:
+    """Trigram-blocked index over accepted canonical names."""
+
+    def __init__(self, cutoff=CUTOFF, max_candidates=MAX_CANDIDATES):
+        self.cutoff = cutoff
+        self.max_candidates = max_candidates
+        self.names = []
+        self._grams = []
+        self._postings = defaultdict(list)
+
+    def add(self, name):
+        idx = len(self.names)
+        grams = _trigrams(name)
+        self.names.append(name)
+        self._grams.append(len(grams))
+        for g in grams:
+            self._postings[g].append(idx)
+
+    def match(self, name):
+        """Best accepted name with similarity >= cutoff, or ``None``."""
+        grams = _trigrams(name)
+        shared = Counter()
+        for g in grams:
+            shared.update(self._postings.get(g, ()))
+        if not shared:
+            return None
+        # 2*M/(|a|+|b|) >= cutoff bounds how different the lengths can be
+        n = len(name)
+        lo, hi = n * self.cutoff / (2 - self.cutoff), n * (2 - self.cutoff) / self.cutoff
+        best, best_score = None, self.cutoff
+        sm = SequenceMatcher()
+        sm.set_seq2(name)
+        for idx, _ in shared.most_common(self.max_candidates):
+            cand = self.names[idx]
+            if not lo <= len(cand) <= hi:
+                continue
+            sm.set_seq1(cand)
+            if sm.real_quick_ratio() < best_score or sm.quick_ratio() < best_score:
+                continue
+            score = sm.ratio()
+            if score >= best_score:
+                best, best_score = cand, score
+        return best
+
+
+def _alias_path(cutoff):
+    return STORE_DIR / f"company_aliases_{int(round(cutoff * 100))}.{VERSION}.parquet"
+
+
+def _prune_aliases(cutoff):
+    # tables written by other versions of the matcher are never read again
+    current = _alias_path(cutoff)
+    for stale in STORE_DIR.glob(f"company_aliases_{int(round(cutoff * 100))}*.parquet"):
+        if stale != current:
+            stale.unlink(missing_ok=True)
+
+
+def _load_aliases(cutoff):
+    try:
+        df = pd.read_parquet(_alias_path(cutoff))
+    except FileNotFoundError:
+        return {}
+    return dict(zip(df["name"], df["canonical"]))
+
+
+def resolve(names, cutoff=CUTOFF):
+    """
+    Map every (already normalised) name to its canonical spelling.
+    Names are processed in order of first appearance; a name either joins
+    the closest accepted name or becomes canonical itself.
+    """
+    unique = list(pd.unique(pd.Series(names, dtype=object).dropna()))
+    with _lock:
+        aliases = _load_aliases(cutoff)
+        new = [n for n in unique if n not in aliases]
+        if new:
+            index = NameIndex(cutoff)
+            for canonical in dict.fromkeys(aliases.values()):
+                index.add(canonical)
+            for name in new:
+                match = index.match(name)
+                if match is None:
+                    index.add(name)
+                    match = name
+                aliases[name] = match
+            STORE_DIR.mkdir(parents=True, exist_ok=True)
+            table = pd.DataFrame({"name": list(aliases), "canonical": list(aliases.values())})
+            atomic_write(_alias_path(cutoff), lambda p: table.to_parquet(p, index=False))
+            _prune_aliases(cutoff)
+    return {n: aliases[n] for n in unique}
+
+
+def canonical_names(raw, cutoff=CUTOFF):
+    """Normalise and de-duplicate a Series of raw company names."""
+    cleaned = normalize(raw)
+    return cleaned.map(resolve(cleaned, cutoff))
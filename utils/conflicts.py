@@ -0,0 +1,80 @@
+"""
+Conflict catalog for the Major Conflicts page.
+
+The catalog lives in ``data/conflicts/``:
+
+* ``index.csv`` — one row per conflict (``war``, ``region``, ``year``,
+  ``file``); this is all the page reads up front,
+* ``<slug>.json`` — the full record (events, troop movements, checkpoints,
+  location, force strengths, image), read only when that conflict is shown,
+* ``images/`` — local photos, served as pre-sized JPEG thumbnails cached
+  under ``data/.store/thumbs/``. Remote image URLs are passed through.
+
+Adding a conflict means adding a JSON file (and optionally an image) and a
+row to the index; nothing in the page changes.
+"""
+import hashlib
+import json
+import threading
+
+from PIL import Image
+
+from utils.data_store import DATA_DIR, STORE_DIR, atomic_write
+from utils.shared import shared_dataset
+
+CATALOG_DIR = DATA_DIR / "conflicts"
+THUMB_DIR = STORE_DIR / "thumbs"
+THUMB_WIDTH = 640
+
+_records = {}
+_lock = threading.Lock()
+
+
+def index():
+    """Shared ``war, region, year, file`` frame (see ``utils.data_store``)."""
+    return shared_dataset("conflict_index")
+
+
+def regions():
+    return sorted(index()["region"].unique())
+
+
+def wars(region):
+    """Conflicts of one region, in catalog order."""
+    idx = index()
+    return idx.loc[idx["region"] == region, "war"].tolist()
+
+
+def record(war):
+    """Full record of one conflict, loaded on first use (and on file change)."""
+    idx = index()
+    path = CATALOG_DIR / idx.loc[idx["war"] == war, "file"].iat[0]
+    mtime = path.stat().st_mtime_ns
+    with _lock:
+        cached = _records.get(war)
+        if cached is None or cached[0] != mtime:
+            _records[war] = cached = (mtime, json.loads(path.read_text(encoding="utf-8")))
+    return cached[1]
+
+
+def thumbnail(war, width=THUMB_WIDTH):
+    """
+    Path of a JPEG (at most ``width`` px wide) for a local image,
+    the URL itself for a remote one, or ``None`` when there is no image.
+    Thumbnails are keyed by the source content, so edits invalidate them.
+    """
+    image = record(war).get("image")
+    if not image or image.startswith(("http://", "https://", "data:")):
+        return image
+    src = CATALOG_DIR / image
+    digest = hashlib.sha256(src.read_bytes()).hexdigest()[:16]
+    thumb = THUMB_DIR / f"{src.stem}_{width}_{digest}.jpg"
+    if not thumb.exists():
+        with Image.open(src) as im:
+            if im.width <= width and im.format == "JPEG":
+                return str(src)  # already small enough
+            im = im.convert("RGB")
+            im.thumbnail((width, width * 4))
+            THUMB_DIR.mkdir(parents=True, exist_ok=True)
+            atomic_write(thumb, lambda p: im.save(p, format="JPEG", quality=85, optimize=True))
+    return str(thumb)
@@ -0,0 +1,245 @@
+"""
+Shared columnar store for the datasets in ``data/``.
+
+Each raw CSV/Excel file is parsed once and written as a typed Parquet file
+under ``data/.store/``. Pages then read through :func:`load`, asking only for
+the columns they need, so reruns never touch the text parsers again.
+
+Copies are invalidated by the SHA-256 of the raw file (recorded in
+``manifest.json``), so touching a file without changing it does not trigger
+a rebuild. Datasets with a country column also get a categorical ``iso3``
+key (see :mod:`utils.entities`).
+
+Rebuild every dataset ahead of a deploy with::
+
+    python -m utils.data_store
+"""
+import hashlib
+import json
+import os
+from collections import namedtuple
+from functools import lru_cache
+from pathlib import Path
+
+import pandas as pd
+
+from utils.compact import compact as compact_frame
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+STORE_DIR = DATA_DIR / ".store"
+MANIFEST = STORE_DIR / "manifest.json"
+
+BUDGET_YEARS = [str(y) for y in range(1960, 2021)]
+
+
+# ─── RAW READERS ───────────────────────────────────────────────────────────────
+def _read_budget(path):
+    df = pd.read_csv(path)
+    for y in BUDGET_YEARS:
+        if y in df.columns:
+            df[y] = pd.to_numeric(df[y], errors="coerce")
+    return df
+
+
+def _read_trade_events(path):
+    return pd.read_csv(path, encoding="latin-1")
+
+
+def _read_expenditure(path):
+    df = pd.read_excel(path)
+    df.columns = [str(c) for c in df.columns]
+    return df
+
+
+def _read_gazetteer(path):
+    # keep_default_na=False: "NA" is Namibia's country code, not a missing value
+    return pd.read_csv(
+        path, keep_default_na=False, dtype={"lat": "float64", "lon": "float64"}
+    )
+
+
+# file: raw file in data/; reader: parses it; index: columns to sort/index by;
+# entity: column holding the country spelling used to derive ``iso3``
+Dataset = namedtuple("Dataset", ["file", "reader", "index", "entity"], defaults=[None, None])
+
+EXPENDITURE_KEY = ["Name", "Indicator Name", "Type"]
+
+DATASETS = {
+    "military_strength_2024": Dataset(
+        "2024_military_strength_by_country.csv", pd.read_csv, entity="country"
+    ),
+    "military_data": Dataset("military_data.csv", pd.read_csv, entity="country"),
+    "defence_budget": Dataset("Cleaned_Defence_Budget.csv", _read_budget, entity="Country Name"),
+    "military_expenditure": Dataset(
+        "Military_Expenditure_final_rounded.xlsx", _read_expenditure, EXPENDITURE_KEY, "Name"
+    ),
+    "trade": Dataset("exports_imports_cleaned.csv", pd.read_csv, entity="country"),
+    "trade_events": Dataset("trade_events_updated2.csv", _read_trade_events, entity="country"),
+    "defence_companies": Dataset(
+        "updated_defense_companies_2005_2020.csv", pd.read_csv, entity="Country"
+    ),
+    "defence_companies_raw": Dataset(
+        "defence_companies_from_2005_final.csv", pd.read_csv, entity="Country"
+    ),
+    # GeoNames places with population >= 1000 (CC BY 4.0), for offline reverse geocoding
+    "gazetteer": Dataset("gazetteer.csv.gz", _read_gazetteer),
+    # one row per conflict; full records are read lazily (see utils.conflicts)
+    "conflict_index": Dataset("conflicts/index.csv", pd.read_csv),
+}
+
+
+# ─── BUILD ─────────────────────────────────────────────────────────────────────
+def source_path(name):
+    return DATA_DIR / DATASETS[name].file
+
+
+def store_path(name):
+    return STORE_DIR / f"{name}.parquet"
+
+
+def file_hash(path):
+    """SHA-256 hex digest of a file's contents."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def atomic_write(path, write):
+    # write-then-rename so concurrent sessions never read a half-written file
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    write(tmp)
+    os.replace(tmp, path)
+
+
+def _read_manifest():
+    try:
+        return json.loads(MANIFEST.read_text())
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _write_manifest(manifest):
+    STORE_DIR.mkdir(parents=True, exist_ok=True)
+    atomic_write(MANIFEST, lambda p: p.write_text(json.dumps(manifest, indent=2)))
+
+
+def raw_hash(name):
+    """
+    Content hash of a dataset's raw file. The hash is only recomputed when
+    the file's mtime/size no longer match what the manifest recorded.
+    """
+    src = source_path(name)
+    st_ = src.stat()
+    entry = _read_manifest().get(name, {})
+    if entry.get("mtime") == st_.st_mtime and entry.get("size") == st_.st_size:
+        return entry["sha256"]
+    return file_hash(src)
+
+
+@lru_cache(maxsize=None)
+def entities_version():
+    """Hash of the ISO3 resolver (aliases included); datasets with an ``iso3`` key depend on it."""
+    return file_hash(Path(__file__).with_name("entities.py"))[:16]
+
+
+def source_version(name):
+    """
+    Version of a dataset's stored copy, for cache keys: the raw file's
+    content hash, plus the resolver's for datasets with an ``iso3`` key.
+    """
+    if DATASETS[name].entity is None:
+        return raw_hash(name)
+    return f"{raw_hash(name)}+{entities_version()}"
+
+
+def is_stale(name):
+    """True when the Parquet copy is missing or built from different content."""
+    entry = _read_manifest().get(name)
+    return (
+        entry is None
+        or not store_path(name).exists()
+        or entry.get("sha256") != raw_hash(name)
+        or (DATASETS[name].entity is not None and entry.get("entities") != entities_version())
+    )
+
+
+def build(name, force=False):
+    """Convert one raw dataset to Parquet if needed and return its path."""
+    out = store_path(name)
+    if not force and not is_stale(name):
+        return out
+    ds = DATASETS[name]
+    src = source_path(name)
+    df = ds.reader(src)
+    if ds.entity:
+        from utils.entities import attach_iso3
+        attach_iso3(df, ds.entity)
+    if ds.index:
+        df = df.set_index(ds.index).sort_index()
+    STORE_DIR.mkdir(parents=True, exist_ok=True)
+    atomic_write(out, lambda p: df.to_parquet(p, index=bool(ds.index)))
+    st_ = src.stat()
+    manifest = _read_manifest()
+    manifest[name] = {
+        "source": ds.file,
+        "sha256": file_hash(src),
+        "mtime": st_.st_mtime,
+        "size": st_.st_size,
+    }
+    if ds.entity:
+        manifest[name]["entities"] = entities_version()
+    _write_manifest(manifest)
+    return out
+
+
+def build_all(force=False):
+    return {name: build(name, force=force) for name in DATASETS}
+
+
+# ─── LOAD ──────────────────────────────────────────────────────────────────────
+def load(name, columns=None, filters=None, compact=False, sparse=False):
+    """
+    Read a dataset from the store, optionally projecting to ``columns`` and
+    pushing ``filters`` (pyarrow DNF, e.g. ``[("Type", "==", "Country")]``)
+    down to the Parquet reader. Only the requested column chunks are decoded.
+
+    ``compact=True`` downcasts numbers, parses formatted numeric text and
+    categorises repeated strings (see :mod:`utils.compact`); ``sparse=True``
+    additionally stores zero-dominated columns sparsely.
+    """
+    df = pd.read_parquet(
+        build(name),
+        columns=list(columns) if columns else None,
+        filters=filters,
+    )
+    if "iso3" in df.columns:
+        from utils.entities import ISO3_DTYPE
+        df["iso3"] = df["iso3"].astype(ISO3_DTYPE)
+    if compact or sparse:
+        df = compact_frame(df, sparse=sparse)
+    return df
+
+
+def load_expenditure(indicator=None, entity_type=None, columns=None):
+    """
+    Read the compiled expenditure workbook, indexed by
+    ``(Name, Indicator Name, Type)``. Every indicator in the workbook is kept
+    in the store; ``indicator`` and ``entity_type`` select rows on read.
+    """
+    filters = []
+    if indicator is not None:
+        filters.append(("Indicator Name", "==", indicator))
+    if entity_type is not None:
+        filters.append(("Type", "==", entity_type))
+    return load("military_expenditure", columns=columns, filters=filters or None)
+
+
+if __name__ == "__main__":
+    from utils.entities import build_entity_table
+
+    for name, path in build_all(force=True).items():
+        print(f"{name:<24} -> {path.relative_to(DATA_DIR.parent)}")
+    resolved = build_entity_table()
+    print(f"{'entities':<24} -> {sum(v is not None for v in resolved.values())}/{len(resolved)} spellings resolved to ISO3")
@@ -0,0 +1,186 @@
+"""
+Client-side playback for pydeck maps with a ``TripsLayer``.
+
+``st.pydeck_chart`` only shows a static deck, so animating it from Python
+means a rerun (and a full deck re-send) per frame. Here the deck is sent
+once, inside a small HTML page with a player (play/pause, a scrubber and a
+caption) that advances the trips layer's ``currentTime`` and the moving
+markers in the browser; the server does nothing during playback.
+
+The page loads deck.gl from pydeck's own bundle (``@deck.gl/jupyter-widget``,
+which includes mapbox-gl 1.x and maplibre), copied once into
+``static/deck/`` under a content-hashed name and served by Streamlit
+(``server.enableStaticServing``), so nothing comes from a CDN and the
+local basemap stays self-contained.
+
+Timestamps are in abstract "steps"; ``seconds_per_step`` sets the speed.
+"""
+import hashlib
+import json
+from pathlib import Path
+
+import pydeck
+import streamlit as st
+import streamlit.components.v1 as components
+
+from utils.data_store import atomic_write
+from utils.theme import STATIC_DIR
+
+BUNDLE = Path(pydeck.__file__).resolve().parent / "nbextension" / "static" / "index.js"
+DECK_DIR = STATIC_DIR / "deck"
+STATIC_URL = "./app/static/deck"
+
+PAGE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<script src="__BUNDLE__"></script>
+<style>
+  body { margin: 0; overflow: hidden; font: 14px sans-serif; }
+  #deck-container { position: relative; width: 100vw; height: 100vh; }
+  .mapboxgl-map, .maplibregl-map { position: absolute; inset: 0; overflow: hidden; }
+  .mapboxgl-canvas, .maplibregl-canvas { position: absolute; left: 0; top: 0; }
+  .mapboxgl-ctrl-bottom-right, .maplibregl-ctrl-bottom-right { position: absolute; right: 0; bottom: 44px; font-size: 11px; }
+  #deck-player { position: absolute; left: 0; right: 0; bottom: 0; z-index: 10; display: flex; gap: 8px;
+                 align-items: center; padding: 6px 10px; background: rgba(255, 255, 255, 0.85); }
+</style>
+</head>
+<body>
+<div id="deck-container"></div>
+<div id="deck-player">
+  <button id="deck-play" style="width:2.5em;">&#9654;</button>
+  <input id="deck-time" type="range" min="0" max="__END__" step="0.01" value="0" style="flex:0 0 30%;">
+  <span id="deck-caption"></span>
+</div>
+<script>
+const cfg = __CONFIG__;
+const deckInstance = createDeck({
+  container: document.getElementById("deck-container"),
+  jsonInput: __DECK__,
+  tooltip: cfg.tooltip,
+  mapboxApiKey: cfg.mapboxKey,
+});
+
+(function () {
+  const play = document.getElementById("deck-play");
+  const scrub = document.getElementById("deck-time");
+  const caption = document.getElementById("deck-caption");
+  let t = 0, playing = false, last = null;
+
+  // position of every trip at time t (linear between timestamps)
+  function heads(trips, t) {
+    return trips.map(function (trip) {
+      const ts = trip.timestamps, p = trip.path;
+      let k = 0;
+      while (k < ts.length - 2 && ts[k + 1] < t) k++;
+      const span = ts[k + 1] - ts[k];
+      const f = span > 0 ? Math.min(Math.max((t - ts[k]) / span, 0), 1) : 1;
+      return {
+        lon: p[k][0] + f * (p[k + 1][0] - p[k][0]),
+        lat: p[k][1] + f * (p[k + 1][1] - p[k][1]),
+        label: trip.label,
+      };
+    });
+  }
+
+  function draw() {
+    const layers = deckInstance.props.layers;
+    const trips = layers.find(function (layer) { return layer.id === cfg.tripsLayer; });
+    if (!trips) {  // the JSON deck is converted asynchronously
+      requestAnimationFrame(draw);
+      return;
+    }
+    deckInstance.setProps({layers: layers.map(function (layer) {
+      if (layer === trips) return layer.clone({currentTime: t});
+      if (layer.id === cfg.headsLayer) return layer.clone({data: heads(trips.props.data, t)});
+      return layer;
+    })});
+    scrub.value = t;
+    let text = "";
+    cfg.steps.forEach(function (s) { if (s.t <= t + 1e-9) text = s.text; });
+    caption.innerHTML = text;
+  }
+
+  function tick(now) {
+    if (!playing) return;
+    if (last !== null) t += (now - last) / 1000 / cfg.secondsPerStep;
+    last = now;
+    if (t >= cfg.end) { t = cfg.end; setPlaying(false); }
+    draw();
+    if (playing) requestAnimationFrame(tick);
+  }
+
+  function setPlaying(on) {
+    playing = on;
+    last = null;
+    play.innerHTML = on ? "&#10073;&#10073;" : "&#9654;";
+    if (on) {
+      if (t >= cfg.end) t = 0;
+      requestAnimationFrame(tick);
+    }
+  }
+
+  play.onclick = function () { setPlaying(!playing); };
+  scrub.oninput = function () { setPlaying(false); t = parseFloat(scrub.value); draw(); };
+  draw();
+})();
+</script>
+</body>
+</html>
+"""
+
+
+def build_bundle():
+    """Copy pydeck's deck.gl bundle into ``static/deck/`` (once per version); returns its file name."""
+    data = BUNDLE.read_bytes()
+    name = f"deckgl.{hashlib.sha256(data).hexdigest()[:12]}.js"
+    out = DECK_DIR / name
+    if not out.exists():
+        DECK_DIR.mkdir(parents=True, exist_ok=True)
+        atomic_write(out, lambda p: p.write_bytes(data))
+        for stale in DECK_DIR.glob("deckgl.*.js"):
+            if stale != out:
+                stale.unlink(missing_ok=True)
+    return name
+
+
+@st.cache_resource(show_spinner=False)
+def _bundle(mtime):
+    return build_bundle()
+
+
+def _script_json(value):
+    # keep "</script>" inside strings from closing the page's script element
+    return json.dumps(value).replace("</", "<\\/")
+
+
+def trips_player(deck, steps, trips_layer, heads_layer=None, tooltip=True, seconds_per_step=1.0, height=560):
+    """
+    Render ``deck`` with a client-side player.
+
+    ``trips_layer`` is the id of the deck's ``TripsLayer`` (inline data with
+    ``path`` as ``[lon, lat]`` pairs, ``timestamps`` in steps and ``label``);
+    playback runs from 0 to its last timestamp. ``steps`` is a list of
+    ``{"t": step, "text": caption}``. ``heads_layer`` names a scatter layer
+    whose data is replaced by the current position of every trip.
+    """
+    trips = next(layer.data for layer in deck.layers if layer.id == trips_layer)
+    end = max((max(trip["timestamps"]) for trip in trips), default=0)
+    config = {
+        "steps": steps,
+        "end": end,
+        "tripsLayer": trips_layer,
+        "headsLayer": heads_layer,
+        "tooltip": tooltip,
+        "mapboxKey": deck.mapbox_key,
+        "secondsPerStep": seconds_per_step,
+    }
+    html = (
+        PAGE.replace("__BUNDLE__", f"{STATIC_URL}/{_bundle(BUNDLE.stat().st_mtime_ns)}")
+        .replace("__END__", str(end))
+        .replace("__CONFIG__", _script_json(config))
+        .replace("__DECK__", deck.to_json().replace("</", "<\\/"))
+    )
+    if hasattr(st, "iframe"):
+        return st.iframe(html, height=height)
+    return components.html(html, height=height)
@@ -0,0 +1,130 @@
+"""
+Derived tables shared by the pages, declared as build artifacts.
+
+Each function below is registered with :func:`utils.artifacts.artifact`
+together with the datasets it reads, so it is recomputed only when one of
+those files (or the function itself) changes.
+"""
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import StandardScaler
+
+from utils import forecast, trends
+from utils.artifacts import artifact
+from utils.company_names import canonical_names
+from utils.data_store import load
+from utils.year_matrix import load_budget_matrix, load_expenditure_matrix
+
+STRENGTH_METRICS = [
+    'total_national_populations',
+    'active_service_military_manpower',
+    'total_military_aircraft_strength',
+    'total_combat_tank_strength',
+    'navy_strength',
+    'national_annual_defense_budgets',
+    'purchasing_power_parities'
+]
+
+REVENUE = "Defense_Revenue_From_A_Year_Ago"
+
+
+# ─── 2047 PREDICTIONS ──────────────────────────────────────────────────────────
+@artifact("strength_scores", sources=["military_strength_2024"])
+def strength_scores():
+    """Mean z-score of the strength metrics, sorted strongest first."""
+    df = load("military_strength_2024", columns=["country", "iso3", "pwr_index"] + STRENGTH_METRICS)
+    for m in STRENGTH_METRICS:
+        df[m] = pd.to_numeric(df[m], errors='coerce')
+    df_clean = df.dropna(subset=STRENGTH_METRICS)
+    scaled = StandardScaler().fit_transform(df_clean[STRENGTH_METRICS])
+    sdf = pd.DataFrame(scaled, columns=STRENGTH_METRICS)
+    sdf['strength_score'] = sdf.mean(axis=1)
+    sdf['country'] = df_clean['country'].values
+    sdf['iso3'] = df_clean['iso3'].values
+    sdf['pwr_index'] = pd.to_numeric(df_clean['pwr_index'], errors='coerce').values
+    return sdf.sort_values('strength_score', ascending=False)
+
+
+@artifact("growth_trajectory", sources=["defence_budget"], deps=["strength_scores"], code=[trends])
+def growth_trajectory(strength_scores):
+    """
+    2000–2020 budget (% GDP) trend per country (slope, R², slope standard
+    error) from one batched fit, plus a 0–1 normalisation of the slope.
+    Countries without a budget series (or a single point) get a flat 0.
+    """
+    budget = load_budget_matrix()
+    fit = trends.matrix_trends(budget, 2000, 2020)
+    rows = np.array([budget.row_index(c) for c in strength_scores['iso3']], dtype=float)
+    found = ~np.isnan(rows)
+    pick = rows[found].astype(int)
+
+    def per_country(values, fill):
+        out = np.full(len(rows), fill)
+        out[found] = values[pick]
+        return out
+
+    df = strength_scores.copy()
+    df['growth_slope'] = np.nan_to_num(per_country(fit.slope, 0.0))
+    df['growth_r2'] = per_country(fit.r2, np.nan)
+    df['growth_se'] = per_country(fit.slope_se, np.nan)
+    gs = df['growth_slope']
+    df['growth_norm'] = (gs - gs.min()) / (gs.max() - gs.min() + 1e-9)
+    return df
+
+
+# ─── FORECASTS ─────────────────────────────────────────────────────────────────
+@artifact("budget_forecast", sources=["defence_budget"], code=[forecast])
+def budget_forecast():
+    """Every budget (% GDP) row forecast to 2047 by its best backtested model."""
+    return forecast.forecast_matrix(load_budget_matrix(), floor=0.0)
+
+
+@artifact("expenditure_forecast", sources=["military_expenditure"], code=[forecast])
+def expenditure_forecast():
+    """Every expenditure (USD) series of the workbook, forecast on the log scale."""
+    return forecast.forecast_matrix(load_expenditure_matrix(entity_type=None), log=True)
+
+
+# ─── DEFENCE COMPANIES ─────────────────────────────────────────────────────────
+@artifact("companies", sources=["defence_companies"])
+def companies():
+    """Company table with normalised, de-duplicated company names."""
+    df = load("defence_companies")
+    df["Company"] = canonical_names(df["Company"])
+    return df
+
+
+def _rank_within_year(df, value):
+    """Sort by year then ``value`` descending and number rows 1..n per year."""
+    df = df.sort_values(by=["Year", value], ascending=[True, False]).reset_index(drop=True)
+    df["rank"] = df.groupby("Year").cumcount() + 1
+    return df
+
+
+@artifact("company_country_revenue", deps=["companies"])
+def company_country_revenue(companies):
+    """Defence revenue per (Year, Country), ranked within each year."""
+    df = companies.groupby(["Year", "Country"])[REVENUE].sum().reset_index()
+    return _rank_within_year(df, REVENUE)
+
+
+@artifact("company_country_counts", deps=["companies"])
+def company_country_counts(companies):
+    """Number of distinct companies per (Year, Country), ranked within each year."""
+    df = companies.groupby(["Year", "Country"])["Company"].nunique().reset_index(name="Count")
+    return _rank_within_year(df, "Count")
+
+
+@artifact("company_evolution", deps=["companies"])
+def company_evolution(companies):
+    """Per (Year, Company, Country) revenue totals with a dense in-year rank."""
+    df = (
+        companies.groupby(["Year", "Company", "Country"], as_index=False)
+        .agg({
+            REVENUE: "sum",
+            "Total Revenue": "sum",
+            "%of Revenue from Defence": "mean"
+        })
+    )
+    df["rank"] = df.groupby("Year")[REVENUE].rank("dense", ascending=False)
+    return df
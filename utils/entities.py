@@ -0,0 +1,197 @@
+"""
+Canonical ISO3 country index shared by every dataset.
+
+The raw files spell countries differently ('AFGHANISTAN', 'U.S.', 'Russian
+Federation', GFP-style codes such as 'GER'). Every spelling is resolved to
+ISO3 once with ``country_converter`` and persisted in
+``data/.store/entities.parquet``; later lookups are dictionary hits and only
+unseen spellings go back through the converter.
+
+All loaders attach an ``iso3`` column using :data:`ISO3_DTYPE`, a single
+categorical dtype, so the category codes line up across datasets and merges
+on ``iso3`` compare small integers instead of strings.
+"""
+import logging
+import threading
+
+import country_converter as coco
+import pandas as pd
+
+from utils.data_store import STORE_DIR, atomic_write
+
+ENTITY_TABLE = STORE_DIR / "entities.parquet"
+
+# Abbreviations the converter's regexes do not recognise
+ALIASES = {
+    "U S A": "USA",
+    "U K": "GBR",
+    "SAUDI ARAB": "SAU",
+    "U ARAB EMTS": "ARE",
+    "NETHERLAND": "NLD",
+    "KYRGHYZSTAN": "KGZ",
+    "C AFRI REP": "CAF",
+    "CONGO D. REP.": "COD",
+    "CONGO P REP": "COG",
+    "DOMINIC REP": "DOM",
+    "PAPUA N GNA": "PNG",
+    "VIETNAM SOC REP": "VNM",
+    "STATE OF PALEST": "PSE",
+    "ST KITT N A": "KNA",
+    "ST PIERRE": "SPM",
+    "BR VIRGN IS": "VGB",
+    "AMERI SAMOA": "ASM",
+    "ANTARTICA": "ATA",
+    "FR POLYNESIA": "PYF",
+    "FR S ANT TR": "ATF",
+    "SVALLBARD AND J": "SJM",
+    "HEARD MACDONALD": "HMD",
+    "BAHARAIN IS": "BHR",
+    "SAHARWI A.DM RP": "ESH",
+    "Beliz": "BLZ",
+    "So Africa": "ZAF",
+    "U.S": "USA",
+    "KOREA DP RP": "PRK",  # the regex reads "Korea ... Rp" as the Republic of Korea
+    # Panama Canal Zone: traded separately from the Republic and has no ISO3
+    # of its own; kept out of PAN rather than merged into it
+    "PANAMA C Z": None,
+}
+
+# Spellings that name the same country within one dataset on purpose;
+# beyond these (and case/punctuation differences) two spellings of one
+# dataset resolving to one ISO3 is an error, see :func:`resolve`
+VARIANTS = {
+    "So. Korea": "South Korea",
+    "Korea": "South Korea",
+    "Swiss": "Switzerland",
+    "So Africa": "South Africa",
+    "S. Africa": "South Africa",
+}
+
+_converter = None
+_table = None
+_lock = threading.Lock()
+
+
+def _cc():
+    global _converter
+    if _converter is None:
+        logging.getLogger("country_converter").setLevel(logging.ERROR)
+        _converter = coco.CountryConverter()
+    return _converter
+
+
+def _iso3_categories():
+    codes = set(_cc().data["ISO3"].dropna()) | {iso for iso in ALIASES.values() if iso}
+    return sorted(codes)
+
+
+ISO3_DTYPE = pd.CategoricalDtype(_iso3_categories())
+
+
+def _load_table():
+    global _table
+    if _table is None:
+        try:
+            df = pd.read_parquet(ENTITY_TABLE)
+            _table = dict(zip(df["spelling"], df["iso3"].astype(object)))
+        except FileNotFoundError:
+            _table = {}
+        # aliases win over spellings persisted before they were added
+        _table.update({s: iso for s, iso in ALIASES.items() if s in _table})
+    return _table
+
+
+def _save_table(table):
+    STORE_DIR.mkdir(parents=True, exist_ok=True)
+    df = pd.DataFrame({"spelling": list(table), "iso3": list(table.values())})
+    df["iso3"] = df["iso3"].astype(ISO3_DTYPE)
+    atomic_write(ENTITY_TABLE, lambda p: df.to_parquet(p, index=False))
+
+
+def _fold(spelling):
+    spelling = VARIANTS.get(spelling, spelling)
+    return "".join(ch for ch in spelling.casefold() if ch.isalnum())
+
+
+def check_distinct(mapping):
+    """
+    Raise ``ValueError`` if two spellings that are not known variants of
+    each other (:data:`VARIANTS`, case, punctuation) share an ISO3 code.
+    """
+    seen = {}
+    clashes = {}
+    for s, iso in mapping.items():
+        if not isinstance(iso, str):  # unresolved: None, or NaN from the parquet table
+            continue
+        first = seen.setdefault(iso, s)
+        if _fold(first) != _fold(s):
+            clashes.setdefault(iso, {first}).add(s)
+    if clashes:
+        detail = "; ".join(f"{iso}: {sorted(names)}" for iso, names in sorted(clashes.items()))
+        raise ValueError(f"Different spellings resolve to the same country ({detail}); add an ALIASES entry")
+
+
+def resolve(spellings, distinct=True):
+    """
+    Map spellings to ISO3 codes (``None`` for regions, aggregates and
+    unknowns). Unseen spellings are converted in one batch and persisted.
+    ``spellings`` come from one dataset: with ``distinct`` (the default)
+    two of them resolving to one country raise (see :func:`check_distinct`).
+    """
+    spellings = [s for s in pd.unique(pd.Series(spellings, dtype=object).dropna())]
+    with _lock:
+        table = _load_table()
+        new = [s for s in spellings if s not in table]
+        if new:
+            converted = _cc().convert(new, src="regex", to="ISO3", not_found=None)
+            if isinstance(converted, str):
+                converted = [converted]
+            for s, iso in zip(new, converted):
+                iso = ALIASES.get(s, iso)
+                # not_found=None echoes the input back; ambiguous matches are lists
+                valid = isinstance(iso, str) and iso in ISO3_DTYPE.categories
+                table[s] = iso if valid else None
+            _save_table(table)
+        out = {s: table[s] for s in spellings}
+    if distinct:
+        check_distinct(out)
+    return out
+
+
+def to_iso3(spelling):
+    """ISO3 code for a single spelling, or ``None``."""
+    return resolve([spelling]).get(spelling)
+
+
+def iso3_series(values):
+    """Categorical ISO3 series (``ISO3_DTYPE``) aligned with ``values``."""
+    values = pd.Series(values, dtype=object)
+    return values.map(resolve(values)).astype(ISO3_DTYPE)
+
+
+def attach_iso3(df, column):
+    """Add the categorical ``iso3`` key derived from ``df[column]``."""
+    df["iso3"] = iso3_series(df[column]).set_axis(df.index)
+    return df
+
+
+def short_names(codes, src="ISO3"):
+    """Short English names for country codes; unknown codes map to themselves."""
+    codes = list(pd.unique(pd.Series(codes, dtype=object).dropna()))
+    names = _cc().convert(codes, src=src, to="name_short", not_found=None)
+    if isinstance(names, str):
+        names = [names]
+    return {c: n if isinstance(n, str) else c for c, n in zip(codes, names)}
+
+
+def build_entity_table():
+    """Resolve every country spelling used by the datasets in one pass."""
+    from utils.data_store import DATASETS, load
+
+    resolved = {}
+    for name, ds in DATASETS.items():
+        if ds.entity:
+            df = load(name)
+            col = df[ds.entity] if ds.entity in df.columns else df.index.get_level_values(ds.entity)
+            resolved.update(resolve(col.dropna().unique()))
+    return resolved
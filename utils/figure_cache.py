@@ -0,0 +1,105 @@
+"""
+Process-wide cache of built Plotly figures and rendered matplotlib charts.
+
+Building an animated ``plotly.express`` figure (grouping every frame,
+validating every trace) is the expensive part of showing it; so is
+rebuilding it from JSON, which validates everything again. Figures are
+keyed by ``(page, figure id, dataset version, widget values)`` and kept as
+built ``go.Figure`` objects in one LRU shared by every session, bounded by
+their total JSON size rather than entry count. A hit hands back the same
+object, which ``st.plotly_chart`` only reads (``to_dict`` plus unvalidated
+JSON), so callers must treat it as read-only. A new dataset version simply
+misses and the old entries age out.
+
+Matplotlib charts are cached the same way as rendered PNG bytes
+(:func:`cached_png`), drawn on a private Agg canvas instead of through
+``pyplot``'s global, lock-protected state.
+
+Hit/miss counters are kept per process; see :func:`stats`.
+"""
+import threading
+from collections import OrderedDict
+from io import BytesIO
+
+import plotly.io as pio
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+MAX_BYTES = 64 * 1024 * 1024
+
+_figures = OrderedDict()
+_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "evictions": 0, "bytes": 0}
+
+
+def _cached(key, make, size=len):
+    with _lock:
+        entry = _figures.get(key)
+        if entry is not None:
+            _figures.move_to_end(key)
+            _stats["hits"] += 1
+            return entry[0]
+    value = make()
+    nbytes = size(value)
+    with _lock:
+        _stats["misses"] += 1
+        _store(key, value, nbytes)
+    return value
+
+
+def cached_figure(page, fig_id, version, params, build):
+    """
+    The figure for ``(page, fig_id, version, params)``; ``build()`` returns
+    a fresh figure on a miss. ``params`` are the widget values the figure
+    depends on and must be hashable (a tuple of them, typically). The
+    figure is shared: pass it to ``st.plotly_chart``, do not modify it.
+    """
+    return _cached(
+        (page, fig_id, version, params), build,
+        size=lambda fig: len(pio.to_json(fig, validate=False)),
+    )
+
+
+def render_png(fig, **savefig_kw):
+    """
+    Rasterise a matplotlib ``Figure`` through its own Agg canvas. No pyplot
+    state is involved, so concurrent sessions never share a current figure.
+    """
+    FigureCanvasAgg(fig)
+    buf = BytesIO()
+    fig.savefig(buf, format="png", **savefig_kw)
+    return buf.getvalue()
+
+
+def cached_png(page, fig_id, version, params, build, **savefig_kw):
+    """
+    PNG bytes for a matplotlib chart, cached like :func:`cached_figure`.
+    ``build()`` must return a ``matplotlib.figure.Figure`` made with the
+    object API (not ``pyplot``).
+    """
+    return _cached((page, fig_id, version, params), lambda: render_png(build(), **savefig_kw))
+
+
+def _store(key, value, nbytes):
+    if nbytes > MAX_BYTES:
+        return
+    old = _figures.pop(key, None)
+    if old is not None:
+        _stats["bytes"] -= old[1]
+    _figures[key] = (value, nbytes)
+    _stats["bytes"] += nbytes
+    while _stats["bytes"] > MAX_BYTES:
+        _, (_, evicted) = _figures.popitem(last=False)
+        _stats["bytes"] -= evicted
+        _stats["evictions"] += 1
+
+
+def stats():
+    """Counters plus the current number of cached figures."""
+    with _lock:
+        return dict(_stats, entries=len(_figures))
+
+
+def clear():
+    with _lock:
+        _figures.clear()
+        _stats.update(hits=0, misses=0, evictions=0, bytes=0)
@@ -0,0 +1,302 @@
+"""
+Batch forecasts for every defence-budget and expenditure series.
+
+Models are registered with :func:`model` and each fits *every* row of a
+``(series, years)`` matrix in one vectorised call:
+
+* ``naive``     – last observed value,
+* ``linear``    – OLS trend over the last :data:`TREND_POINTS` years (the
+  slope the 2047 projection uses),
+* ``ses``       – simple exponential smoothing,
+* ``holt``      – Holt's linear-trend exponential smoothing,
+* ``damped``    – Holt with a damped trend,
+* ``piecewise`` – continuous piecewise-linear trend with the best single
+  change point (chosen by BIC against no change point).
+
+Smoothing parameters are picked per series from a small grid by in-sample
+one-step error; all grid points run side by side as one array.
+
+:func:`forecast_matrix` backtests every model on rolling origins (the last
+:data:`HOLDOUT` years, and the :data:`HOLDOUT` before them), keeps the
+model with the lowest mean absolute error per series, and forecasts each
+series to :data:`FORECAST_END` with a 90% band scaled from its backtest
+errors. The (model, origin) fits are independent jobs spread over a process
+pool. Results are stored as artifacts (see :mod:`utils.derived`), so pages
+only read them.
+"""
+import multiprocessing
+import os
+import warnings
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+
+import numpy as np
+import pandas as pd
+
+from utils.trends import fit_trends
+
+FORECAST_END = 2047    # every series is forecast up to this year
+HOLDOUT = 5            # years forecast per backtest origin
+ORIGINS = 2            # backtest origins, each HOLDOUT years further back
+MIN_FIT = 8            # fewer points: not backtested, falls back to naive
+TREND_POINTS = 21      # linear model window (2000–2020 for the budget)
+MIN_SEGMENT = 5        # points on each side of a change point
+Z90 = 1.645
+
+# exponential smoothing grids (level, trend, damping)
+ALPHAS = (0.2, 0.4, 0.6, 0.8, 1.0)
+BETAS = (0.05, 0.1, 0.2, 0.4)
+PHIS = (0.8, 0.9, 0.95)
+
+# fn(y, steps) -> (series, steps) forecasts; y is right-aligned (see align)
+Model = namedtuple("Model", ["name", "fn", "min_points"])
+
+MODELS = {}
+
+
+def model(name, min_points=2):
+    """Register ``fn(y, steps)`` as forecasting model ``name``."""
+    def register(fn):
+        MODELS[name] = Model(name, fn, min_points)
+        return fn
+    return register
+
+
+# ─── PREPARATION ───────────────────────────────────────────────────────────────
+def align(values):
+    """
+    Right-align every row on its latest observation.
+
+    Returns ``(y, last, n)``: ``y`` has each row's last value in the final
+    column, leading NaN before its first and interior gaps linearly
+    interpolated; ``last`` is the column of that value in ``values`` and
+    ``n`` the number of points from first to last observation.
+    """
+    values = np.asarray(values, dtype=float)
+    m, t = values.shape
+    valid = ~np.isnan(values)
+    cols = np.arange(t)
+    last = np.where(valid.any(axis=1), t - 1 - np.argmax(valid[:, ::-1], axis=1), -1)
+    first = np.where(valid.any(axis=1), np.argmax(valid, axis=1), t)
+
+    # interior gaps: interpolate between the neighbouring observations
+    prev = np.maximum.accumulate(np.where(valid, cols, -1), axis=1)
+    nxt = np.minimum.accumulate(np.where(valid, cols, t)[:, ::-1], axis=1)[:, ::-1]
+    inside = ~valid & (prev >= 0) & (nxt < t)
+    lo = np.take_along_axis(values, np.clip(prev, 0, t - 1), axis=1)
+    hi = np.take_along_axis(values, np.clip(nxt, 0, t - 1), axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        share = (cols - prev) / (nxt - prev)
+    filled = np.where(inside, lo + share * (hi - lo), values)
+
+    shift = (t - 1 - last)[:, None]
+    src = cols - shift
+    y = np.where(src >= 0, np.take_along_axis(filled, np.clip(src, 0, t - 1), axis=1), np.nan)
+    return y, last, np.maximum(last - first + 1, 0)
+
+
+def _steps(steps):
+    return np.arange(1, steps + 1, dtype=float)
+
+
+# ─── MODELS ────────────────────────────────────────────────────────────────────
+@model("naive", min_points=1)
+def naive(y, steps):
+    return np.repeat(y[:, -1:], steps, axis=1)
+
+
+@model("linear", min_points=3)
+def linear(y, steps):
+    window = y[:, -TREND_POINTS:]
+    fit = fit_trends(np.arange(window.shape[1]), window)
+    end = window.shape[1] - 1
+    return fit.intercept[:, None] + fit.slope[:, None] * (end + _steps(steps))
+
+
+def exp_smoothing(y, steps, alphas, betas=(0.0,), phis=(0.0,)):
+    """
+    Additive exponential smoothing for every row and every grid point at
+    once; each row keeps the grid point with the lowest one-step SSE.
+    ``phis=(0,)`` drops the trend (simple smoothing), ``1`` is Holt's.
+    """
+    grid = np.array(list(product(alphas, betas, phis)))
+    a, b, p = (grid[:, i, None] for i in range(3))
+    g, (m, t) = len(grid), y.shape
+    level = np.zeros((g, m))
+    trend = np.zeros((g, m))
+    sse = np.zeros((g, m))
+    seen = np.zeros(m, dtype=int)
+    for j in range(t):
+        obs = y[:, j]
+        ok = ~np.isnan(obs)
+        pred = level + p * trend
+        run = ok & (seen >= 2)
+        sse += np.where(run, (obs - pred) ** 2, 0.0)
+        new_level = a * obs + (1 - a) * pred
+        new_trend = b * (new_level - level) + (1 - b) * p * trend
+        # first point sets the level, the second the initial trend
+        trend = np.where(run, new_trend, np.where(ok & (seen == 1), obs - level, trend))
+        level = np.where(run, new_level, np.where(ok, obs, level))
+        seen += ok
+    best = np.argmin(sse, axis=0)
+    pick = lambda arr: np.take_along_axis(arr, best[None], axis=0)[0]  # noqa: E731
+    damp = np.cumsum(p ** _steps(steps), axis=1)[best]  # phi + ... + phi^h
+    return pick(level)[:, None] + pick(trend)[:, None] * damp
+
+
+@model("ses", min_points=3)
+def ses(y, steps):
+    return exp_smoothing(y, steps, ALPHAS)
+
+
+@model("holt", min_points=4)
+def holt(y, steps):
+    return exp_smoothing(y, steps, ALPHAS, BETAS, (1.0,))
+
+
+@model("damped", min_points=4)
+def damped(y, steps):
+    return exp_smoothing(y, steps, ALPHAS, BETAS, PHIS)
+
+
+def _masked_ols(X, y, valid):
+    """Per-row least squares ``y[i] ≈ X @ beta[i]`` over valid cells; ``(beta, sse)``."""
+    w = valid.astype(float)
+    y0 = np.where(valid, y, 0.0)
+    xtx = np.einsum("mt,ti,tj->mij", w, X, X)
+    xty = np.einsum("mt,ti->mi", w * y0, X)
+    beta = (np.linalg.pinv(xtx) @ xty[..., None])[..., 0]
+    sse = (w * (y0 - beta @ X.T) ** 2).sum(axis=1)
+    return beta, sse
+
+
+@model("piecewise", min_points=2 * MIN_SEGMENT)
+def piecewise(y, steps):
+    m, t = y.shape
+    x = np.arange(t, dtype=float)
+    valid = ~np.isnan(y)
+    n = valid.sum(axis=1)
+    first = t - n
+    nn = np.maximum(n, 1)
+
+    def bic(sse, k):
+        return nn * np.log(sse / nn + 1e-12) + k * np.log(nn)
+
+    beta, sse = _masked_ols(np.column_stack([np.ones(t), x]), y, valid)
+    best = bic(sse, 2)
+    end_value = beta[:, 0] + beta[:, 1] * x[-1]
+    end_slope = beta[:, 1]
+    for brk in range(MIN_SEGMENT, t - MIN_SEGMENT):
+        X = np.column_stack([np.ones(t), x, np.maximum(x - brk, 0.0)])
+        beta, sse = _masked_ols(X, y, valid)
+        score = bic(sse, 4)  # + the change point's position
+        better = (brk - first >= MIN_SEGMENT) & (score < best)
+        best = np.where(better, score, best)
+        end_value = np.where(better, beta @ X[-1], end_value)
+        end_slope = np.where(better, beta[:, 1] + beta[:, 2], end_slope)
+    return end_value[:, None] + end_slope[:, None] * _steps(steps)
+
+
+# ─── BATCH JOB ─────────────────────────────────────────────────────────────────
+def _fit(job):
+    name, y, steps = job
+    return MODELS[name].fn(y, steps)
+
+
+def _run_jobs(jobs, workers):
+    if workers > 1 and len(jobs) > 1:
+        # spawn: safe from inside the threaded Streamlit server too
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs)), mp_context=ctx) as pool:
+            return list(pool.map(_fit, jobs))
+    return [_fit(job) for job in jobs]
+
+
+def backtest_errors(y, n, forecasts, models):
+    """
+    Per-model ``(mae, scale)`` over the backtest origins: mean absolute
+    error, and the RMS of ``error / sqrt(horizon)`` that scales the bands.
+    Series too short to train at an origin are left out of it (NaN).
+    """
+    steps = _steps(HOLDOUT)
+    out = {}
+    for name in models:
+        abs_err, sq_err = [], []
+        for o in range(1, ORIGINS + 1):
+            cut = o * HOLDOUT
+            actual = y[:, y.shape[1] - cut:y.shape[1] - cut + HOLDOUT]
+            fit_ok = (n - cut >= max(MIN_FIT, MODELS[name].min_points))[:, None]
+            err = np.where(fit_ok, forecasts[name, o] - actual, np.nan)
+            abs_err.append(np.abs(err))
+            sq_err.append(err ** 2 / steps)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)  # all-NaN rows
+            out[name] = (np.nanmean(np.hstack(abs_err), axis=1), np.sqrt(np.nanmean(np.hstack(sq_err), axis=1)))
+    return out
+
+
+def forecast_matrix(matrix, log=False, floor=None, end=FORECAST_END, models=None, workers=None):
+    """
+    Backtest, select and forecast every row of a :class:`YearMatrix`.
+
+    ``log`` fits multiplicative series (e.g. USD) on the log scale, where
+    non-positive values count as missing; ``floor`` clips forecasts and
+    bands from below. Returns one row per (series, forecast year) with the
+    chosen ``model``, its ``backtest_mae`` (in fitted units) and a 90%
+    ``lower``/``upper`` band.
+    """
+    models = list(models or MODELS)
+    values = np.asarray(matrix.values, dtype=float)
+    if log:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            values = np.where(values > 0, np.log(values), np.nan)
+    y, last, n = align(values)
+    keep = n > 0
+    y, last, n = y[keep], last[keep], n[keep]
+    last_year = matrix.years[last]
+    horizon = int(end - last_year.min())
+    if horizon < 1:
+        raise ValueError(f"Series already end in {last_year.min()}, nothing to forecast up to {end}")
+
+    jobs = {}
+    for name in models:
+        jobs[name, 0] = (name, y, horizon)
+        for o in range(1, ORIGINS + 1):
+            jobs[name, o] = (name, y[:, :y.shape[1] - o * HOLDOUT], HOLDOUT)
+    results = _run_jobs(list(jobs.values()), workers or os.cpu_count() or 1)
+    forecasts = dict(zip(jobs, results))
+
+    errors = backtest_errors(y, n, forecasts, models)
+    mae = np.column_stack([errors[name][0] for name in models])
+    scale = np.column_stack([errors[name][1] for name in models])
+    tested = ~np.isnan(mae).all(axis=1)
+    choice = np.where(tested, np.argmin(np.where(np.isnan(mae), np.inf, mae), axis=1), models.index("naive"))
+    rows = np.arange(len(y))
+    point = np.stack([forecasts[name, 0] for name in models], axis=1)[rows, choice]
+    half = Z90 * scale[rows, choice][:, None] * np.sqrt(_steps(horizon))
+    lower, upper = point - half, point + half
+    if log:
+        point, lower, upper = np.exp(point), np.exp(lower), np.exp(upper)
+    if floor is not None:
+        point, lower, upper = (np.maximum(a, floor) for a in (point, lower, upper))
+
+    years = last_year[:, None] + _steps(horizon).astype(int)
+    inside = years <= end
+    series = np.repeat(rows, horizon).reshape(len(y), horizon)[inside]
+    codes = matrix.codes[keep] if matrix.codes is not None else np.full(len(y), None, dtype=object)
+    return pd.DataFrame({
+        "name": pd.Categorical(matrix.names[keep][series]),
+        "iso3": pd.Categorical(codes[series]),
+        "year": years[inside].astype("int16"),
+        "forecast": point[inside],
+        "lower": lower[inside],
+        "upper": upper[inside],
+        "model": pd.Categorical(np.asarray(models, dtype=object)[choice][series], categories=models),
+        "backtest_mae": mae[rows, choice][series],
+    })
+
+
+def series_forecast(df, key):
+    """One series' rows of a forecast frame, by name or ISO3, in year order."""
+    return df[(df["name"] == key) | (df["iso3"] == key)].sort_values("year")
@@ -0,0 +1,142 @@
+"""
+Offline reverse geocoding.
+
+Coordinates are matched against the bundled GeoNames gazetteer
+(``data/gazetteer.csv.gz``, ~145k places) with a KD-tree over unit vectors,
+so a lookup is a nearest-neighbour query of a few microseconds and needs no
+network. Points further than :data:`MAX_KM` from any place are described
+relative to the nearest one ("120 km from Basra, Basra, Iraq").
+
+Nominatim (geopy) is only an optional fallback for those far-off points,
+enabled with ``GEOCODE_ONLINE=1``. Every answer is persisted under
+``data/.store/`` per gazetteer version, so it survives restarts.
+"""
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from scipy.spatial import cKDTree
+
+from utils.data_store import STORE_DIR, atomic_write, load, source_version
+from utils.entities import short_names
+
+try:
+    from geopy.extra.rate_limiter import RateLimiter
+    from geopy.geocoders import Nominatim
+except ImportError:  # geopy is optional
+    Nominatim = None
+
+EARTH_RADIUS_KM = 6371.0
+MAX_KM = 50.0
+ONLINE = os.environ.get("GEOCODE_ONLINE") == "1" and Nominatim is not None
+
+_lock = threading.Lock()
+_cache = {}
+
+
+def _unit_vectors(lat, lon):
+    lat, lon = np.radians(lat), np.radians(lon)
+    return np.column_stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)])
+
+
+class ReverseGeocoder:
+    """Nearest gazetteer place for any number of coordinates."""
+
+    def __init__(self, places):
+        countries = short_names(places["cc"], src="ISO2")
+        parts = pd.DataFrame({
+            "name": places["name"],
+            "admin1": places["admin1"],
+            "country": places["cc"].map(countries),
+        })
+        # "Name, Region, Country", skipping empty or repeated parts
+        self.labels = np.array([
+            ", ".join(dict.fromkeys(p for p in row if p)) for row in parts.itertuples(index=False)
+        ], dtype=object)
+        self.tree = cKDTree(_unit_vectors(places["lat"].to_numpy(), places["lon"].to_numpy()))
+
+    def query(self, lat, lon):
+        """``(labels, distances_km)`` for arrays of coordinates."""
+        chord, idx = self.tree.query(_unit_vectors(np.atleast_1d(lat), np.atleast_1d(lon)))
+        km = 2 * EARTH_RADIUS_KM * np.arcsin(np.minimum(chord / 2, 1.0))
+        return self.labels[idx], km
+
+
+@st.cache_resource(show_spinner=False)
+def _geocoder(version):
+    return ReverseGeocoder(load("gazetteer"))
+
+
+def geocoder():
+    """Shared reverse geocoder, rebuilt when the gazetteer changes."""
+    return _geocoder(source_version("gazetteer"))
+
+
+# ─── PERSISTED CACHE ──────────────────────────────────────────────────────────
+def _cache_path(version):
+    return STORE_DIR / f"geocode_{version[:16]}.parquet"
+
+
+def _load_cache(version):
+    if version not in _cache:
+        try:
+            df = pd.read_parquet(_cache_path(version))
+            _cache[version] = dict(zip(zip(df["lat"], df["lon"]), df["label"]))
+        except FileNotFoundError:
+            _cache[version] = {}
+    return _cache[version]
+
+
+def _save_cache(version, cache):
+    STORE_DIR.mkdir(parents=True, exist_ok=True)
+    keys = list(cache)
+    df = pd.DataFrame({
+        "lat": [k[0] for k in keys], "lon": [k[1] for k in keys], "label": list(cache.values()),
+    })
+    atomic_write(_cache_path(version), lambda p: df.to_parquet(p, index=False))
+
+
+@st.cache_resource(show_spinner=False)
+def _nominatim():
+    """One rate-limited Nominatim client per process, so the 1 s delay holds across lookups."""
+    return RateLimiter(Nominatim(user_agent="conflict_dashboard").reverse, min_delay_seconds=1)
+
+
+def _online(lat, lon):
+    if not ONLINE:
+        return None
+    try:
+        loc = _nominatim()((lat, lon), language="en")
+    except Exception:  # network or service errors: keep the offline answer
+        return None
+    return loc.address if loc else None
+
+
+def reverse_geocode_many(lats, lons):
+    """
+    Human-readable places for arrays of coordinates. The gazetteer version
+    is resolved once per call, misses share one KD-tree query and the
+    persisted cache is written once.
+    """
+    version = source_version("gazetteer")
+    keys = [(round(float(a), 4), round(float(b), 4)) for a, b in zip(lats, lons)]
+    with _lock:
+        cache = _load_cache(version)
+        missing = list(dict.fromkeys(k for k in keys if k not in cache))
+    if missing:
+        labels, km = _geocoder(version).query(*np.array(missing).T)
+        found = {
+            key: label if dist <= MAX_KM else _online(*key) or f"{dist:.0f} km from {label}"
+            for key, label, dist in zip(missing, labels, km)
+        }
+        with _lock:
+            cache.update(found)
+            _save_cache(version, cache)
+    return [cache[k] for k in keys]
+
+
+def reverse_geocode(lat, lon):
+    """Human-readable place for one coordinate pair."""
+    return reverse_geocode_many([lat], [lon])[0]
@@ -0,0 +1,230 @@
+"""
+Bundled country geometry for the choropleths.
+
+Plotly's built-in geometry is fetched by the browser and only comes at two
+fixed resolutions. ``data/countries.geojson.gz`` holds Natural Earth 1:110m
+country outlines keyed by canonical ISO3 (``Feature.id``, the same codes
+``utils.entities`` assigns), with exterior rings wound the way d3 expects.
+
+From it, :data:`LEVELS` precomputes Douglas-Peucker simplifications (small
+islands dropped below the tolerance) written to
+``static/geo/countries-<level>.<hash>.json``. Simplification is
+topology-preserving: rings are cut into arcs at junctions (vertices where
+three or more border edges meet), and every arc is simplified once, so a
+border shared by two countries stays shared instead of opening slivers.
+Charts reference a level by URL (``geojson=geojson_url(level)``) rather
+than embedding it, so the geometry stays out of every figure's JSON and the
+browser fetches and caches each level once. :func:`level_for` picks the
+coarsest level whose error stays under a pixel for the map's size.
+
+Build ahead of time with ``python -m utils.geometry``; otherwise the levels
+are written on first use.
+"""
+import gzip
+import hashlib
+import json
+import threading
+from collections import defaultdict
+
+import numpy as np
+import streamlit as st
+
+from utils.data_store import DATA_DIR, atomic_write, file_hash
+from utils.theme import STATIC_DIR
+
+SOURCE = DATA_DIR / "countries.geojson.gz"
+GEO_DIR = STATIC_DIR / "geo"
+STATIC_URL = "./app/static/geo"
+
+# level -> Douglas-Peucker tolerance in degrees (0 keeps the source as is);
+# the pages' maps (450-820px for the whole world) resolve to "medium"
+LEVELS = {"full": 0.0, "fine": 0.1, "medium": 0.25}
+# plot-area pixels per map height on a default 450px Plotly figure
+DEFAULT_HEIGHT = 450
+
+_lock = threading.Lock()
+
+
+# ─── SIMPLIFICATION ────────────────────────────────────────────────────────────
+def _douglas_peucker(points, tol):
+    """Indices of the points kept by Douglas-Peucker (endpoints always kept)."""
+    keep = np.zeros(len(points), dtype=bool)
+    keep[[0, -1]] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        a, b = stack.pop()
+        if b - a < 2:
+            continue
+        seg = points[b] - points[a]
+        rel = points[a + 1:b] - points[a]
+        norm = np.hypot(*seg)
+        if norm == 0:
+            dist = np.hypot(rel[:, 0], rel[:, 1])
+        else:
+            dist = np.abs(seg[0] * rel[:, 1] - seg[1] * rel[:, 0]) / norm
+        i = int(np.argmax(dist))
+        if dist[i] > tol:
+            mid = a + 1 + i
+            keep[mid] = True
+            stack += [(a, mid), (mid, b)]
+    return keep
+
+
+def _ring_area(ring):
+    x, y = ring[:, 0], ring[:, 1]
+    return 0.5 * abs(np.dot(x[:-1], y[1:]) - np.dot(x[1:], y[:-1]))
+
+
+def _simplify_arc(arc, tol):
+    arc = np.asarray(arc, dtype=float)
+    if len(arc) < 3:
+        return arc
+    if not np.array_equal(arc[0], arc[-1]):
+        return arc[_douglas_peucker(arc, tol)]
+    # a closed arc is split at its farthest vertex so both halves have distinct ends
+    far = int(np.argmax(np.hypot(*(arc - arc[0]).T)))
+    keep = np.concatenate([
+        _douglas_peucker(arc[:far + 1], tol),
+        _douglas_peucker(arc[far:], tol)[1:],
+    ])
+    return arc[keep]
+
+
+def _polygons(geometry):
+    return [geometry["coordinates"]] if geometry["type"] == "Polygon" else geometry["coordinates"]
+
+
+class Topology:
+    """
+    Shared-border structure of a feature collection. Rings are cut at
+    junctions into arcs; each arc is simplified in one canonical direction
+    and cached, so every ring using it gets exactly the same vertices.
+    """
+
+    def __init__(self, features):
+        neighbours = defaultdict(set)
+        for feature in features:
+            for rings in _polygons(feature["geometry"]):
+                for ring in rings:
+                    pts = [tuple(p) for p in ring]
+                    for a, b in zip(pts, pts[1:]):
+                        neighbours[a].add(b)
+                        neighbours[b].add(a)
+        self.junctions = {p for p, nbs in neighbours.items() if len(nbs) > 2}
+        self._arcs = {}
+
+    def _arc(self, arc, tol):
+        forward = tuple(arc)
+        canonical = min(forward, forward[::-1])
+        key = (canonical, tol)
+        if key not in self._arcs:
+            self._arcs[key] = _simplify_arc(canonical, tol)
+        out = self._arcs[key]
+        return out if canonical == forward else out[::-1]
+
+    def simplify_ring(self, ring, tol, drop_small=True):
+        ring = np.asarray(ring, dtype=float)
+        if tol == 0:
+            return ring
+        if drop_small and _ring_area(ring) < tol * tol:
+            return None  # smaller than the error we accept: drop it
+        pts = [tuple(p) for p in ring[:-1]]
+        cuts = [i for i, p in enumerate(pts) if p in self.junctions]
+        # start at a junction, or at the smallest vertex of a ring that has none
+        # (an enclave's ring), so both sides of a border cut it the same way
+        start = cuts[0] if cuts else pts.index(min(pts))
+        pts = pts[start:] + pts[:start]
+        cuts = [i for i, p in enumerate(pts) if p in self.junctions] or [0]
+        closed = pts + [pts[0]]
+        bounds = cuts + [len(pts)]
+        parts = [self._arc(closed[a:b + 1], tol) for a, b in zip(bounds, bounds[1:])]
+        out = np.concatenate([parts[0]] + [part[1:] for part in parts[1:]])
+        return out if len(out) >= 4 else None
+
+
+def simplify(geometry, tol, decimals, topology):
+    """
+    Simplified ``Polygon``/``MultiPolygon`` using ``topology`` (built over
+    every feature) for shared borders; the largest polygon always survives.
+    """
+    polygons = _polygons(geometry)
+    out = []
+    for rings in polygons:
+        outer = topology.simplify_ring(rings[0], tol)
+        if outer is None:
+            continue
+        holes = (topology.simplify_ring(r, tol) for r in rings[1:])
+        out.append([np.round(r, decimals).tolist() for r in [outer, *holes] if r is not None])
+    if not out:
+        outer = max((np.asarray(p[0], dtype=float) for p in polygons), key=_ring_area)
+        small = topology.simplify_ring(outer, tol, drop_small=False)
+        out = [[np.round(outer if small is None else small, decimals).tolist()]]
+    if len(out) == 1:
+        return {"type": "Polygon", "coordinates": out[0]}
+    return {"type": "MultiPolygon", "coordinates": out}
+
+
+# ─── BUILD ─────────────────────────────────────────────────────────────────────
+def _source():
+    with gzip.open(SOURCE, "rt", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def build_levels():
+    """Write every level (once per source and code version); returns ``{level: file name}``."""
+    version = hashlib.sha256((file_hash(SOURCE) + file_hash(__file__)).encode()).hexdigest()[:12]
+    manifest_path = GEO_DIR / f"manifest.{version}.json"
+    with _lock:
+        if manifest_path.exists():
+            return json.loads(manifest_path.read_text())
+        GEO_DIR.mkdir(parents=True, exist_ok=True)
+        source = _source()
+        topology = Topology(source["features"])
+        files = {}
+        for level, tol in LEVELS.items():
+            decimals = 4 if tol == 0 else max(2, int(np.ceil(-np.log10(tol))) + 1)
+            features = [
+                dict(feature, geometry=simplify(feature["geometry"], tol, decimals, topology))
+                for feature in source["features"]
+            ]
+            data = json.dumps({"type": "FeatureCollection", "features": features}, separators=(",", ":"))
+            digest = hashlib.sha256(data.encode()).hexdigest()[:12]
+            name = f"countries-{level}.{digest}.json"
+            if not (GEO_DIR / name).exists():
+                atomic_write(GEO_DIR / name, lambda p: p.write_text(data, encoding="utf-8"))
+            files[level] = name
+        keep = set(files.values()) | {manifest_path.name}
+        for stale in GEO_DIR.iterdir():
+            if stale.name not in keep:
+                stale.unlink()
+        atomic_write(manifest_path, lambda p: p.write_text(json.dumps(files)))
+        return files
+
+
+@st.cache_resource(show_spinner=False)
+def _levels(mtime):
+    return build_levels()
+
+
+# ─── RUNTIME ───────────────────────────────────────────────────────────────────
+def level_for(height=DEFAULT_HEIGHT, span=180.0):
+    """
+    Coarsest level whose tolerance stays under one pixel when ``span``
+    degrees of latitude fill ``height`` pixels (a whole-world or globe view
+    spans 180).
+    """
+    deg_per_px = span / max(height, 1)
+    fitting = [level for level, tol in LEVELS.items() if tol <= deg_per_px]
+    return max(fitting, key=LEVELS.get)
+
+
+def geojson_url(level=None):
+    """URL of a level's GeoJSON (features keyed by ISO3 in ``id``)."""
+    files = _levels(SOURCE.stat().st_mtime_ns)
+    return f"{STATIC_URL}/{files[level or level_for()]}"
+
+
+if __name__ == "__main__":
+    for level, name in build_levels().items():
+        size = (GEO_DIR / name).stat().st_size
+        print(f"{level:<8} {name}  {size / 1024:.0f} KB")
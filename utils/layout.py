@@ -0,0 +1,23 @@
+"""
+Layout helpers shared by the pages.
+"""
+import streamlit as st
+
+
+def lazy_tabs(labels, key):
+    """
+    Tab bar that runs only the selected tab.
+
+    ``st.tabs`` executes every tab body on every rerun, visible or not.
+    This renders the labels as a horizontal radio (like the insights switch
+    on the conflicts page) and returns the selected label, so the caller
+    runs just that tab. Wrap each tab body in ``st.fragment`` so its own
+    widgets rerun only that tab.
+    """
+    return st.radio(
+        "Section",
+        labels,
+        horizontal=True,
+        key=key,
+        label_visibility="collapsed",
+    )
@@ -0,0 +1,217 @@
+"""
+Monte Carlo uncertainty for the projected strength ranking.
+
+Each simulated scenario
+
+* bootstraps the 2000–2020 budget residuals of every country around its
+  fitted trend and refits the slope (one batched :func:`~utils.trends.fit_trends`
+  call for the whole chunk), re-normalising growth as the artifact does,
+* perturbs the standardised strength metrics with Gaussian noise
+  (``metric_noise``, in standard deviations),
+* scores and ranks every country with the projection formula of
+  :mod:`utils.projection`.
+
+Scenarios run in chunks of :data:`CHUNK`; chunk ``k`` of a run draws from
+its own generator seeded with ``(seed, k)``, so results do not depend on
+how chunks are scheduled. A chunk reduces to a ``country × rank`` count
+matrix plus score sums, which add up across chunks. Runs are kept per
+``(data version, seed, parameters)``: asking for more samples only computes
+the missing chunks, fewer samples reuse a prefix. Large requests are spread
+over a process pool whose workers receive the :class:`SimInputs` once, at
+start-up, so each task only carries its parameters and chunk index.
+"""
+import math
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from itertools import repeat
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils import artifacts
+from utils.projection import (
+    BASE_YEAR, DEFAULT_PENALTY, DEFAULT_TARGET, GROWTH_STEP, model, normalise_weights,
+)
+from utils.trends import fit_trends
+from utils.year_matrix import load_budget_matrix
+
+CHUNK = 250            # scenarios per chunk (sample counts round up to this)
+POOL_MIN_CHUNKS = 8    # smaller requests run in-process
+MAX_RUNS = 16          # cached (seed, parameters) runs
+DEFAULT_NOISE = 0.1
+TREND_WINDOW = (2000, 2020)
+
+# fitted/residuals/valid: (series, years) for countries with a budget series;
+# series_rows: their row in the model; z/pwr: model arrays
+SimInputs = namedtuple(
+    "SimInputs", ["x", "fitted", "residuals", "n_valid", "valid", "series_rows", "z", "pwr"]
+)
+Chunk = namedtuple("Chunk", ["rank_counts", "score_sum", "score_sq"])
+
+_runs = OrderedDict()
+_lock = threading.Lock()
+
+
+# ─── INPUTS ────────────────────────────────────────────────────────────────────
+def build_inputs(proj):
+    """Residual pools and model arrays for :func:`simulate_chunk`."""
+    budget = load_budget_matrix()
+    rows = np.array([budget.row_index(c) for c in proj.iso3], dtype=float)
+    series_rows = np.flatnonzero(~np.isnan(rows))
+    years, values = budget.year_range(*TREND_WINDOW)
+    y = values[rows[series_rows].astype(int)]
+    x = (years - years[0]).astype(float)
+    fit = fit_trends(x, y)
+    valid = ~np.isnan(y)
+    fitted = np.where(np.isnan(fit.slope)[:, None], y, fit.intercept[:, None] + fit.slope[:, None] * x)
+    # each row's residuals packed to the front, so a draw in [0, n_valid) picks one
+    resid = np.where(valid, y - fitted, np.nan)
+    order = np.argsort(~valid, axis=1, kind="stable")
+    packed = np.nan_to_num(np.take_along_axis(resid, order, axis=1))
+    return SimInputs(x, fitted, packed, valid.sum(axis=1), valid, series_rows, proj.z, proj.pwr)
+
+
+@st.cache_resource(show_spinner=False)
+def _inputs(version):
+    return build_inputs(model())
+
+
+# ─── ONE CHUNK ─────────────────────────────────────────────────────────────────
+def simulate_chunk(inputs, params, seed, k, size=CHUNK):
+    """Simulate chunk ``k`` of a run; returns its :class:`Chunk` summary."""
+    weights, target_year, penalty, noise = params
+    rng = np.random.default_rng([seed, k])
+    m, t = inputs.fitted.shape
+    n = len(inputs.pwr)
+
+    # residual bootstrap, refit every series of every scenario at once
+    pick = (rng.random((size, m, t)) * inputs.n_valid[:, None]).astype(np.intp)
+    resampled = np.take_along_axis(np.broadcast_to(inputs.residuals, (size, m, t)), pick, axis=2)
+    y = np.where(inputs.valid, inputs.fitted + resampled, np.nan)
+    slopes = np.nan_to_num(fit_trends(inputs.x, y.reshape(size * m, t)).slope.reshape(size, m))
+    growth = np.zeros((size, n))
+    growth[:, inputs.series_rows] = slopes
+    lo, hi = growth.min(axis=1, keepdims=True), growth.max(axis=1, keepdims=True)
+    growth_norm = (growth - lo) / (hi - lo + 1e-9)
+
+    z = inputs.z + noise * rng.standard_normal((size, *inputs.z.shape))
+    score = (
+        z @ np.asarray(weights)
+        + growth_norm * ((target_year - BASE_YEAR) / GROWTH_STEP)
+        - penalty * inputs.pwr
+    )
+    order = np.argsort(-score, axis=1, kind="stable")
+    ranks = np.empty_like(order)
+    np.put_along_axis(ranks, order, np.arange(n), axis=1)
+    counts = np.bincount((np.arange(n) * n + ranks).ravel(), minlength=n * n).reshape(n, n)
+    return Chunk(counts, score.sum(axis=0), (score ** 2).sum(axis=0))
+
+
+# ─── POOL ──────────────────────────────────────────────────────────────────────
+_worker_inputs = None  # set in each pool worker by _init_worker
+
+
+def _init_worker(inputs):
+    global _worker_inputs
+    _worker_inputs = inputs
+
+
+def _worker_chunk(params, seed, k):
+    return simulate_chunk(_worker_inputs, params, seed, k)
+
+
+@st.cache_resource(show_spinner=False, max_entries=1, on_release=lambda pool: pool.shutdown(wait=False))
+def _pool(workers, version):
+    # spawn: forking the threaded Streamlit server is unsafe
+    return ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker, initargs=(_inputs(version),),
+    )
+
+
+def _compute(version, params, seed, ks, workers):
+    if workers > 1 and len(ks) >= POOL_MIN_CHUNKS:
+        try:
+            return list(_pool(workers, version).map(
+                _worker_chunk, repeat(params), repeat(seed), ks,
+                chunksize=max(1, len(ks) // (4 * workers)),
+            ))
+        except BrokenProcessPool:  # a worker died: drop the pool, finish in-process
+            _pool.clear()
+    inputs = _inputs(version)
+    return [simulate_chunk(inputs, params, seed, k) for k in ks]
+
+
+# ─── RUNS ──────────────────────────────────────────────────────────────────────
+class _Run:
+    def __init__(self):
+        self.chunks = []
+        self.lock = threading.Lock()
+
+
+def _run(key):
+    with _lock:
+        run = _runs.get(key)
+        if run is None:
+            run = _runs[key] = _Run()
+            while len(_runs) > MAX_RUNS:
+                _runs.popitem(last=False)
+        _runs.move_to_end(key)
+    return run
+
+
+def rank_quantile(counts, q):
+    """Per-row 1-based rank at cumulative share ``q`` of a rank-count matrix."""
+    cum = np.cumsum(counts, axis=1)
+    return (cum < q * cum[:, -1:]).sum(axis=1) + 1
+
+
+def simulate(samples, seed=0, weights=None, target_year=DEFAULT_TARGET, penalty=DEFAULT_PENALTY,
+             metric_noise=DEFAULT_NOISE, level=0.9, top=10, workers=None):
+    """
+    Rank distribution of every country over ``samples`` scenarios (rounded
+    up to whole chunks), sorted by median projected rank. Columns:
+    ``median_rank``, ``rank_low``/``rank_high`` (central ``level`` interval),
+    ``p_top`` (share of scenarios inside the top ``top``), ``mean_score``,
+    ``score_sd``. ``df.attrs["samples"]`` is the number actually used.
+    """
+    params = (normalise_weights(weights), int(target_year), float(penalty), float(metric_noise))
+    version = artifacts.key("growth_trajectory")
+    workers = workers or os.cpu_count() or 1
+    needed = max(1, math.ceil(samples / CHUNK))
+    run = _run((version, int(seed), params))
+    with run.lock:
+        have = len(run.chunks)
+        if have < needed:
+            run.chunks += _compute(version, params, int(seed), list(range(have, needed)), workers)
+        chunks = run.chunks[:needed]
+
+    counts = sum(c.rank_counts for c in chunks)
+    total = needed * CHUNK
+    mean = sum(c.score_sum for c in chunks) / total
+    var = np.maximum(sum(c.score_sq for c in chunks) / total - mean ** 2, 0.0)
+    tail = (1 - level) / 2
+    proj = model()
+    df = pd.DataFrame({
+        "country": proj.countries,
+        "iso3": proj.iso3,
+        "median_rank": rank_quantile(counts, 0.5),
+        "rank_low": rank_quantile(counts, tail),
+        "rank_high": rank_quantile(counts, 1 - tail),
+        "p_top": counts[:, :top].sum(axis=1) / total,
+        "mean_score": mean,
+        "score_sd": np.sqrt(var),
+    })
+    df = df.sort_values(["median_rank", "mean_score"], ascending=[True, False], kind="stable")
+    df.attrs["samples"] = total
+    return df.reset_index(drop=True)
+
+
+def clear():
+    with _lock:
+        _runs.clear()
@@ -0,0 +1,153 @@
+"""
+Parameterised strength projections for the predictions page.
+
+The projection behind the 2047 ranking is linear in its inputs::
+
+    strength   = Z @ w                               (Z: standardised metrics)
+    projected  = strength + growth_norm * (target_year - BASE_YEAR) / GROWTH_STEP
+    score      = projected - penalty * pwr_index
+
+:class:`ProjectionModel` keeps ``Z`` (already standardised in the
+``strength_scores`` artifact), ``growth_norm`` and ``pwr_index`` as
+read-only arrays, built once per ``growth_trajectory`` artifact key. The
+year/penalty term is a per-country offset cached per ``(target_year,
+penalty)``, so a change of weights costs one matrix-vector product and a
+sort. :func:`projection` caches the full ranked frame per parameter set;
+moving the ``top_n`` slider only slices it.
+
+Weights are normalised to sum to 1, so equal weights reproduce the original
+mean z-score and scaling every weight gives the same result (and cache entry).
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils import artifacts
+from utils.derived import STRENGTH_METRICS
+
+BASE_YEAR = 2024
+GROWTH_STEP = 5  # years per unit of normalised budget growth
+DEFAULT_TARGET = 2047
+DEFAULT_PENALTY = 0.1
+
+METRIC_LABELS = {
+    'total_national_populations': "Population",
+    'active_service_military_manpower': "Active manpower",
+    'total_military_aircraft_strength': "Aircraft",
+    'total_combat_tank_strength': "Tanks",
+    'navy_strength': "Navy",
+    'national_annual_defense_budgets': "Defence budget",
+    'purchasing_power_parities': "Purchasing power",
+}
+
+
+def normalise_weights(weights=None):
+    """
+    Weights as a tuple in :data:`STRENGTH_METRICS` order, summing to 1.
+    ``weights`` may be ``None`` (equal), a sequence, or a ``{metric: w}``
+    mapping (missing metrics get 0).
+    """
+    if weights is None:
+        w = np.ones(len(STRENGTH_METRICS))
+    elif isinstance(weights, dict):
+        unknown = set(weights) - set(STRENGTH_METRICS)
+        if unknown:
+            raise ValueError(f"Unknown strength metrics: {sorted(unknown)}")
+        w = np.array([weights.get(m, 0.0) for m in STRENGTH_METRICS], dtype=float)
+    else:
+        w = np.asarray(weights, dtype=float)
+        if w.shape != (len(STRENGTH_METRICS),):
+            raise ValueError(f"Expected {len(STRENGTH_METRICS)} weights, got {w.shape}")
+    if np.any(w < 0) or w.sum() <= 0:
+        raise ValueError("Weights must be non-negative and not all zero")
+    return tuple(float(v) for v in w / w.sum())
+
+
+class ProjectionModel:
+    """Precomputed arrays for scoring any (weights, target year, penalty)."""
+
+    def __init__(self, frame):
+        self.countries = frame["country"].to_numpy(dtype=object)
+        self.iso3 = frame["iso3"].astype(object).to_numpy()
+        self.z = np.ascontiguousarray(frame[STRENGTH_METRICS].to_numpy(dtype=float))
+        self.growth = frame["growth_norm"].to_numpy(dtype=float)
+        self.pwr = frame["pwr_index"].to_numpy(dtype=float)
+        for arr in (self.z, self.growth, self.pwr):
+            arr.setflags(write=False)
+        self._offsets = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.countries)
+
+    def strength(self, weights=None):
+        """Weighted strength score of every country."""
+        return self.z @ np.asarray(normalise_weights(weights))
+
+    def offset(self, target_year=DEFAULT_TARGET, penalty=DEFAULT_PENALTY):
+        """``projection_score - strength``: growth drift minus the power-index penalty."""
+        key = (int(target_year), float(penalty))
+        with self._lock:
+            out = self._offsets.get(key)
+            if out is None:
+                if len(self._offsets) >= 256:  # long scenario sweeps
+                    self._offsets.clear()
+                drift = self.growth * ((key[0] - BASE_YEAR) / GROWTH_STEP)
+                out = drift - key[1] * self.pwr
+                out.setflags(write=False)
+                self._offsets[key] = out
+        return out
+
+    def scores(self, weights=None, target_year=DEFAULT_TARGET, penalty=DEFAULT_PENALTY):
+        """``(strength, projected, score)`` arrays in model order."""
+        strength = self.strength(weights)
+        score = strength + self.offset(target_year, penalty)
+        return strength, score + float(penalty) * self.pwr, score
+
+    def frame(self, weights=None, target_year=DEFAULT_TARGET, penalty=DEFAULT_PENALTY):
+        """Every country with its scores and both ranks, sorted by projection."""
+        strength, projected, score = self.scores(weights, target_year, penalty)
+        df = pd.DataFrame({
+            "country": self.countries,
+            "iso3": self.iso3,
+            "strength_score": strength,
+            "projected_strength": projected,
+            "projection_score": score,
+            "current_rank": _ranks(strength),
+            "projected_rank": _ranks(score),
+        })
+        return df.iloc[np.argsort(-score, kind="stable")].reset_index(drop=True)
+
+
+def _ranks(values):
+    """1-based rank of each entry, highest value first (ties by model order)."""
+    ranks = np.empty(len(values), dtype=int)
+    ranks[np.argsort(-values, kind="stable")] = np.arange(1, len(values) + 1)
+    return ranks
+
+
+@st.cache_resource(show_spinner=False)
+def _model(version):
+    return ProjectionModel(artifacts.get("growth_trajectory"))
+
+
+def model():
+    """Shared projection model, rebuilt when the growth trajectory changes."""
+    return _model(artifacts.key("growth_trajectory"))
+
+
+@st.cache_resource(show_spinner=False, max_entries=256)
+def _projection(version, weights, target_year, penalty):
+    return _model(version).frame(weights, target_year, penalty)
+
+
+def projection(weights=None, target_year=DEFAULT_TARGET, penalty=DEFAULT_PENALTY):
+    """
+    Ranked projection for one parameter set (see :meth:`ProjectionModel.frame`),
+    cached process-wide; the returned frame is a copy-on-write view.
+    """
+    version = artifacts.key("growth_trajectory")
+    df = _projection(version, normalise_weights(weights), int(target_year), float(penalty))
+    return df.copy(deep=False)
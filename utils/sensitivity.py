@@ -0,0 +1,97 @@
+"""
+Weight sensitivity of the strength ranking.
+
+Scores are linear in the metric weights: with raw weights ``w`` summing to
+``W``, ``s = Z @ w / W + c`` where ``Z`` is the standardised metric matrix
+of :class:`~utils.projection.ProjectionModel` and ``c`` the projection's
+growth/penalty offset (zero for the current strength score). A new weight
+vector is one matrix-vector product.
+
+Moving one weight ``w_k`` by ``d`` with the others fixed, countries ``i``
+and ``j`` swap places at::
+
+    d = -W * (s_i - s_j) / (z_ik - z_jk + c_i - c_j)
+
+so for every country and metric, the nearest swap in each direction is a
+min/max over a ``(countries, countries, metrics)`` array of such ratios.
+:func:`weight_stability` evaluates it in row blocks of at most
+:data:`BLOCK_CELLS` cells, so memory stays linear in the number of
+countries and larger (subnational, historical) tables only cost time.
+"""
+import numpy as np
+import pandas as pd
+
+from utils.derived import STRENGTH_METRICS
+from utils.projection import DEFAULT_PENALTY, _ranks, model, normalise_weights
+
+BLOCK_CELLS = 1 << 22  # pair × metric cells per block (32 MB of float64)
+
+
+def weight_stability(z, weights, offset=None):
+    """
+    How far each raw weight can move before each country's rank changes.
+
+    Returns ``(down, up)``, both ``(countries, metrics)``: the largest
+    decrease and increase of weight ``k`` (others fixed) that keeps
+    country ``i`` in its position; ``inf`` when no other country can cross
+    in that direction. Decreases are not capped at the current weight: one
+    larger than ``w_k`` would need a negative weight, i.e. the position
+    survives dropping the metric.
+    """
+    z = np.asarray(z, dtype=float)
+    w = np.asarray(weights, dtype=float)
+    normalise_weights(w)  # validates
+    total = w.sum()
+    n, k = z.shape
+    c = np.zeros(n) if offset is None else np.asarray(offset, dtype=float)
+    s = z @ (w / total) + c
+
+    down = np.empty((n, k))
+    up = np.empty((n, k))
+    block = max(1, BLOCK_CELLS // (n * k))
+    for lo in range(0, n, block):
+        rows = slice(lo, min(lo + block, n))
+        gap = total * (s[rows, None] - s[None, :])                          # (b, n)
+        slope = z[rows, None, :] - z[None, :, :] + (c[rows, None] - c[None, :])[..., None]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            d = -gap[..., None] / slope                                     # (b, n, k)
+        d[np.arange(rows.stop - lo), np.arange(lo, rows.stop)] = np.nan     # i with itself
+        up[rows] = np.where(d > 0, d, np.inf).min(axis=1)
+        down[rows] = -np.where(d < 0, d, -np.inf).max(axis=1)
+    return down, up
+
+
+def sensitivity(weights=None, target_year=None, penalty=DEFAULT_PENALTY):
+    """
+    Ranking for raw ``weights`` (``None``: equal) with the stable range of
+    every weight per country, sorted by rank. ``target_year`` ranks by the
+    projection score instead of the current strength score.
+
+    Columns: ``country``, ``iso3``, ``rank``, ``score``, ``<metric>_low`` /
+    ``<metric>_high`` (the weight range keeping the country's position,
+    floored at zero weight), ``tightest`` (metric with the smallest move
+    that changes the rank) and ``margin`` (that move as a share of the total
+    weight, ``inf`` if no single weight can change it).
+    """
+    proj = model()
+    w = np.ones(len(STRENGTH_METRICS)) if weights is None else np.asarray(weights, dtype=float)
+    offset = None if target_year is None else proj.offset(target_year, penalty)
+    score = proj.z @ np.asarray(normalise_weights(w)) + (0.0 if offset is None else offset)
+    down, up = weight_stability(proj.z, w, offset)
+
+    # decreases beyond zero weight cannot happen: no crossing in that direction
+    reachable_down = np.where(down <= w, down, np.inf)
+    move = np.minimum(reachable_down, up) / w.sum()
+    tightest = np.argmin(move, axis=1)
+    df = pd.DataFrame({
+        "country": proj.countries,
+        "iso3": proj.iso3,
+        "rank": _ranks(score),
+        "score": score,
+    })
+    for j, m in enumerate(STRENGTH_METRICS):
+        df[f"{m}_low"] = np.maximum(w[j] - down[:, j], 0.0)
+        df[f"{m}_high"] = w[j] + up[:, j]
+    df["tightest"] = np.asarray(STRENGTH_METRICS, dtype=object)[tightest]
+    df["margin"] = move[np.arange(len(move)), tightest]
+    return df.sort_values("rank", kind="stable").reset_index(drop=True)
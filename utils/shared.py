@@ -0,0 +1,67 @@
+"""
+Process-wide read-only frames shared by every session.
+
+``st.cache_data`` pickles its return value and unpickles a fresh copy on
+every call, so each rerun of each session paid a full deserialisation of
+the frame. Frames here are built once per (key, version), kept in one
+process-wide registry and handed out as shallow copy-on-write views:
+borrowing costs O(columns), never O(rows), and no data is duplicated.
+
+Copy-on-write (always on from pandas 3, switched on here for pandas 2)
+guarantees that a page writing into its borrowed view copies only the
+blocks it touches; the shared frame itself is never modified. Pages that
+intend to mutate should still say so explicitly with :func:`writable`.
+"""
+import threading
+
+import pandas as pd
+
+from utils import artifacts
+from utils.data_store import load, source_version
+
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
+
+_frames = {}
+_lock = threading.Lock()
+
+
+def borrow(key, version, build):
+    """
+    Zero-copy view of the shared frame ``key`` at ``version``; ``build()``
+    runs once per version and older versions of ``key`` are dropped.
+    """
+    with _lock:
+        entry = _frames.get(key)
+        if entry is None or entry[0] != version:
+            _frames[key] = entry = (version, build())
+    return entry[1].copy(deep=False)
+
+
+def shared_dataset(name, **load_kwargs):
+    """Borrow a store dataset (see :func:`utils.data_store.load`)."""
+    key = ("dataset", name, tuple(sorted((k, repr(v)) for k, v in load_kwargs.items())))
+    return borrow(key, source_version(name), lambda: load(name, **load_kwargs))
+
+
+def shared_artifact(name):
+    """Borrow a derived artifact (see :mod:`utils.artifacts`)."""
+    return borrow(("artifact", name), artifacts.key(name), lambda: artifacts.get(name))
+
+
+def writable(df, columns=()):
+    """
+    Explicit copy-on-write: a frame that is safe to modify in place. Data
+    is copied lazily, block by block, on first write; ``columns`` listed
+    here are materialised up front for pages that rewrite them wholesale.
+    """
+    out = df.copy(deep=False)
+    for c in columns:
+        out[c] = df[c].copy(deep=True)
+    return out
+
+
+def clear():
+    """Drop every shared frame (e.g. after rebuilding the store)."""
+    with _lock:
+        _frames.clear()
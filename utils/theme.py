@@ -0,0 +1,224 @@
+"""
+Page backgrounds as static, content-hashed assets.
+
+Pages used to point their CSS at remote stock images (fetched by every
+visitor) or, on the acknowledgements page, inline a base64 GIF into every
+rerun. Backgrounds are now registered in :data:`BACKGROUNDS` and built once
+into ``static/bg/``, which Streamlit serves as plain files (``server.
+enableStaticServing`` in ``.streamlit/config.toml``):
+
+* remote sources are downloaded once (``data/.store/assets/``),
+* each source gets resized variants (:data:`WIDTHS`, never upscaled) as
+  WebP plus a JPEG/GIF fallback, named by content hash so browsers can
+  cache them indefinitely,
+* ``static/bg/manifest.json`` maps each background to its variants.
+
+Build (or refresh) the assets with::
+
+    python -m utils.theme
+
+At runtime :func:`apply_background` emits one small ``<style>`` block per
+page. A background that has not been built falls back to its remote URL, or
+to no image at all when the source is missing, and logs a warning either way.
+"""
+import hashlib
+import json
+import logging
+import urllib.request
+from collections import namedtuple
+from io import BytesIO
+from pathlib import Path
+
+import streamlit as st
+from PIL import Image, ImageSequence
+
+from utils.data_store import DATA_DIR, STORE_DIR, atomic_write
+
+STATIC_DIR = Path(__file__).resolve().parent.parent / "static"
+BG_DIR = STATIC_DIR / "bg"
+BG_MANIFEST = BG_DIR / "manifest.json"
+ASSET_DIR = STORE_DIR / "assets"
+STATIC_URL = "./app/static/bg"
+WIDTHS = (1280, 1920)
+
+log = logging.getLogger(__name__)
+
+# url: remote original; file: local original in data/
+Background = namedtuple("Background", ["url", "file"], defaults=[None, None])
+
+BACKGROUNDS = {
+    "home": Background(url=(
+        "https://static.vecteezy.com/system/resources/previews/027/103/278/non_2x/silhouette-soldiers-"
+        "descend-from-helicopter-warning-of-danger-against-a-sunset-background-with-space-for-text-"
+        "promoting-peace-and-cessation-of-hostilities-free-photo.jpg"
+    )),
+    "war_scene": Background(
+        url="https://t4.ftcdn.net/jpg/03/49/86/71/240_F_349867133_a2Upqgg99LIDvsGbR4Of3a0bXCwqzrAQ.jpg"
+    ),
+    "flag": Background(file="Flag_Animation.gif"),
+}
+
+BASE_CSS = """
+    /* Translucent sidebar */
+    [data-testid="stSidebar"] {
+      background-color: rgba(0, 0, 0, 0.6);
+    }
+    /* Centered hero text */
+    .css-1lcbmhc {
+      text-align: center !important;
+      padding: 1rem !important;
+    }
+"""
+
+
+# ─── BUILD ─────────────────────────────────────────────────────────────────────
+def _original(name):
+    """Bytes of a background's original, downloading remote ones once."""
+    bg = BACKGROUNDS[name]
+    if bg.file:
+        return (DATA_DIR / bg.file).read_bytes()
+    cached = ASSET_DIR / f"{name}{Path(bg.url).suffix or '.img'}"
+    if not cached.exists():
+        ASSET_DIR.mkdir(parents=True, exist_ok=True)
+        req = urllib.request.Request(bg.url, headers={"User-Agent": "Mozilla/5.0"})
+        with urllib.request.urlopen(req, timeout=30) as resp:
+            data = resp.read()
+        atomic_write(cached, lambda p: p.write_bytes(data))
+    return cached.read_bytes()
+
+
+def _resized_frames(im, width):
+    scale = min(1.0, width / im.width)
+    size = (max(1, round(im.width * scale)), max(1, round(im.height * scale)))
+    frames, durations = [], []
+    for frame in ImageSequence.Iterator(im):
+        frames.append(frame.convert("RGBA").resize(size, Image.LANCZOS))
+        durations.append(frame.info.get("duration", im.info.get("duration", 100)))
+    return frames, durations
+
+
+def _encode(frames, durations, fmt):
+    buf = BytesIO()
+    animated = len(frames) > 1
+    if fmt == "webp":
+        first = frames[0]
+        kwargs = dict(save_all=True, append_images=frames[1:], duration=durations, loop=0) if animated else {}
+        first.save(buf, format="WEBP", quality=80, method=6, **kwargs)
+    elif animated:
+        frames[0].save(
+            buf, format="GIF", save_all=True, append_images=frames[1:],
+            duration=durations, loop=0, optimize=True, disposal=2,
+        )
+    else:
+        frames[0].convert("RGB").save(buf, format="JPEG", quality=82, optimize=True, progressive=True)
+    return buf.getvalue()
+
+
+def build_background(name):
+    """Write every variant of one background; returns its manifest entry."""
+    with Image.open(BytesIO(_original(name))) as im:
+        animated = getattr(im, "is_animated", False)
+        fallback = "gif" if animated else "jpg"
+        variants = []
+        for width in sorted({min(w, im.width) for w in WIDTHS}):
+            frames, durations = _resized_frames(im, width)
+            files = {}
+            for fmt in ("webp", fallback):
+                data = _encode(frames, durations, fmt)
+                digest = hashlib.sha256(data).hexdigest()[:12]
+                out = BG_DIR / f"{name}-{width}.{digest}.{fmt}"
+                if not out.exists():
+                    atomic_write(out, lambda p: p.write_bytes(data))
+                files[fmt] = out.name
+            variants.append({"width": width, "webp": files["webp"], "fallback": files[fallback]})
+    return {"animated": animated, "variants": variants}
+
+
+def build_all():
+    """
+    Build every background that has a reachable source; returns the manifest.
+    A background whose rebuild fails keeps its previous variants.
+    """
+    BG_DIR.mkdir(parents=True, exist_ok=True)
+    previous = _read_manifest()
+    manifest = {}
+    for name in BACKGROUNDS:
+        try:
+            manifest[name] = build_background(name)
+        except (OSError, ValueError) as err:  # missing file, network failure, bad image
+            if name in previous:
+                manifest[name] = previous[name]
+                print(f"{name:<12} kept previous build: {err}")
+            else:
+                print(f"{name:<12} skipped: {err}")
+    keep = {BG_MANIFEST.name} | {
+        f for entry in manifest.values() for v in entry["variants"] for f in (v["webp"], v["fallback"])
+    }
+    for stale in BG_DIR.iterdir():
+        if stale.name not in keep:
+            stale.unlink()
+    atomic_write(BG_MANIFEST, lambda p: p.write_text(json.dumps(manifest, indent=2)))
+    return manifest
+
+
+# ─── RUNTIME ───────────────────────────────────────────────────────────────────
+def _read_manifest():
+    try:
+        return json.loads(BG_MANIFEST.read_text())
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _image_rules(name, entry):
+    """CSS rules setting the background image (largest variant by default)."""
+    if entry is None:
+        url = BACKGROUNDS[name].url
+        log.warning(
+            "background %r is not in %s (run `python -m utils.theme`); %s",
+            name, BG_MANIFEST.relative_to(STATIC_DIR.parent),
+            "using the remote original" if url else "no image shown",
+        )
+        return [f".stApp {{ background-image: url('{url}'); }}"] if url else []
+    fallback_type = "image/gif" if entry["animated"] else "image/jpeg"
+    rules = []
+    # widest first, then narrower screens override it
+    for i, v in enumerate(reversed(entry["variants"])):
+        fallback, webp = f"{STATIC_URL}/{v['fallback']}", f"{STATIC_URL}/{v['webp']}"
+        rule = (
+            f".stApp {{ background-image: url('{fallback}'); background-image: image-set("
+            f"url('{webp}') type('image/webp'), url('{fallback}') type('{fallback_type}')); }}"
+        )
+        rules.append(rule if i == 0 else f"@media (max-width: {v['width']}px) {{ {rule} }}")
+    return rules
+
+
+@st.cache_resource(show_spinner=False)
+def _css(name, mtime):
+    rules = "\n".join(f"    {r}" for r in _image_rules(name, _read_manifest().get(name)))
+    return (
+        "<style>\n"
+        "    .stApp { background: no-repeat center center fixed; background-size: cover; }\n"
+        f"{rules}\n"
+        f"{BASE_CSS}"
+        "</style>"
+    )
+
+
+def background_css(name):
+    """The page's ``<style>`` block (built once per asset build)."""
+    try:
+        mtime = BG_MANIFEST.stat().st_mtime_ns
+    except FileNotFoundError:
+        mtime = None
+    return _css(name, mtime)
+
+
+def apply_background(name):
+    """Emit the background and shared page styling for ``name``."""
+    st.markdown(background_css(name), unsafe_allow_html=True)
+
+
+if __name__ == "__main__":
+    for name, entry in build_all().items():
+        sizes = ", ".join(f"{v['width']}px" for v in entry["variants"])
+        print(f"{name:<12} -> {sizes}")
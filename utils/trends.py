@@ -0,0 +1,61 @@
+"""
+Batched linear trend fits for many series at once.
+
+Fitting one scikit-learn regression per country means a Python loop, a
+filter and an estimator object per row. Ordinary least squares with one
+regressor has a closed form, so :func:`fit_trends` fits every row of a
+``(series, points)`` matrix in a handful of masked NumPy reductions. NaN
+cells are simply left out of each row's fit; :func:`matrix_trends` applies
+it to a :class:`~utils.year_matrix.YearMatrix` over any year window.
+"""
+from collections import namedtuple
+
+import numpy as np
+
+# per-row arrays; rows with fewer than ``min_points`` values are NaN (n is exact)
+Trend = namedtuple("Trend", ["slope", "intercept", "r2", "slope_se", "intercept_se", "n"])
+
+
+def fit_trends(x, values, min_points=2):
+    """
+    OLS fit ``values[i] ≈ intercept[i] + slope[i] * x`` for every row.
+
+    ``x`` is shared by all rows (length ``values.shape[1]``); NaN cells are
+    skipped. Standard errors need three points and R² a non-constant
+    series; otherwise they are NaN.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(values, dtype=float)
+    valid = ~np.isnan(y)
+    n = valid.sum(axis=1)
+    ok = n >= min_points
+    nn = np.where(ok, n, 1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        xs = np.where(valid, x, 0.0)
+        ys = np.where(valid, y, 0.0)
+        x_mean = xs.sum(axis=1) / nn
+        y_mean = ys.sum(axis=1) / nn
+        dx = np.where(valid, x - x_mean[:, None], 0.0)
+        dy = np.where(valid, y - y_mean[:, None], 0.0)
+        sxx = (dx * dx).sum(axis=1)
+        sxy = (dx * dy).sum(axis=1)
+        syy = (dy * dy).sum(axis=1)
+
+        slope = np.where(ok & (sxx > 0), sxy / sxx, np.where(ok, 0.0, np.nan))
+        intercept = np.where(ok, y_mean - slope * x_mean, np.nan)
+        ss_res = np.maximum(syy - slope * sxy, 0.0)
+        r2 = np.where(ok & (syy > 0), 1 - ss_res / syy, np.nan)
+        sigma2 = np.where(n > 2, ss_res / (n - 2), np.nan)
+        slope_se = np.sqrt(sigma2 / sxx)
+        intercept_se = np.sqrt(sigma2 * (1 / nn + x_mean ** 2 / sxx))
+    return Trend(slope, intercept, r2, slope_se, intercept_se, n)
+
+
+def matrix_trends(matrix, start=None, end=None, min_points=2):
+    """
+    Trend of every row of a :class:`YearMatrix` over ``[start, end]``;
+    ``x`` counts years from the window's first year, so the intercept is
+    the fitted value at ``start``.
+    """
+    years, values = matrix.year_range(start, end)
+    return fit_trends(years - years[0], values, min_points=min_points)
@@ -0,0 +1,173 @@
+"""
+Dense entity × year matrices for the wide year-column datasets.
+
+The budget CSV stores one string column per year ('1960'..'2020'). Rather
+than rebuilding lists of column names and melting/transposing on every rerun,
+pages get a :class:`YearMatrix`: a read-only, C-contiguous float matrix with
+integer row and year indexes, so year windows and per-country rows are plain
+NumPy slices. Each matrix also carries row-wise prefix sums, so the total of
+any year range is a single subtraction.
+"""
+import numpy as np
+import streamlit as st
+
+from utils.data_store import BUDGET_YEARS, load, load_expenditure, source_version
+
+EXPENDITURE_INDICATOR = 'Military expenditure (current USD)'
+EXPENDITURE_YEARS = [str(y) for y in range(1960, 2019)]
+
+
+class YearMatrix:
+    """Read-only ``values[row, year]`` matrix over a contiguous year range."""
+
+    def __init__(self, names, years, values, codes=None):
+        self.names = np.asarray(names, dtype=object)
+        self.codes = np.asarray(codes, dtype=object) if codes is not None else None
+        self.years = np.asarray(years, dtype=int)
+        if np.any(np.diff(self.years) != 1):
+            raise ValueError("YearMatrix years must be contiguous and ascending")
+        self.year0 = int(self.years[0])
+        self.values = np.ascontiguousarray(values, dtype=float)
+        self.mask = np.isnan(self.values)
+        # prefix[:, j] = sum of the first j years (NaN counted as 0)
+        self.prefix = np.zeros((len(self.values), len(self.years) + 1))
+        np.cumsum(np.where(self.mask, 0.0, self.values), axis=1, out=self.prefix[:, 1:])
+        for arr in (self.values, self.mask, self.prefix):
+            arr.setflags(write=False)
+        self._rows = {n: i for i, n in enumerate(self.names)}
+        if self.codes is not None:
+            self._rows.update(
+                {c: i for i, c in enumerate(self.codes) if isinstance(c, str) and c not in self._rows}
+            )
+
+    @classmethod
+    def from_wide(cls, df, name_col, year_cols, code_col=None):
+        """Build from a wide frame with one column per year."""
+        return cls(
+            df[name_col].to_numpy(),
+            [int(y) for y in year_cols],
+            df[list(year_cols)].to_numpy(dtype=float),
+            codes=df[code_col].astype(object).to_numpy() if code_col else None,
+        )
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, key):
+        return key in self._rows
+
+    # ── indexing ──────────────────────────────────────────────────────────────
+    def row_index(self, key):
+        """Row number for a name (or ISO3 code), or ``None`` if absent."""
+        return self._rows.get(key)
+
+    def _span(self, start=None, end=None):
+        """Column slice for the inclusive year range ``[start, end]``, clamped to the matrix."""
+        n = len(self.years)
+        lo = 0 if start is None else min(max(int(start) - self.year0, 0), n)
+        hi = n if end is None else min(max(int(end) - self.year0 + 1, 0), n)
+        return slice(lo, max(hi, lo))
+
+    def year_range(self, start=None, end=None):
+        """``(years, values)`` views for every row over ``[start, end]``."""
+        s = self._span(start, end)
+        return self.years[s], self.values[:, s]
+
+    def row(self, key, start=None, end=None):
+        """One entity's series over ``[start, end]``; empty if unknown."""
+        i = self.row_index(key)
+        s = self._span(start, end)
+        if i is None:
+            return np.empty(0)
+        return self.values[i, s]
+
+    def column(self, year):
+        """Every entity's value for one year; ``KeyError`` outside the matrix's years."""
+        j = int(year) - self.year0
+        if not 0 <= j < len(self.years):
+            raise KeyError(f"{year} is outside {self.year0}–{self.years[-1]}")
+        return self.values[:, j]
+
+    def valid(self, start=None, end=None):
+        """Boolean mask of non-NaN cells over ``[start, end]``."""
+        return ~self.mask[:, self._span(start, end)]
+
+    # ── aggregates ────────────────────────────────────────────────────────────
+    def range_sum(self, start=None, end=None):
+        """Per-row total over ``[start, end]`` (NaN skipped) via prefix sums; zeros for an empty range."""
+        s = self._span(start, end)
+        return self.prefix[:, s.stop] - self.prefix[:, s.start]
+
+    def decades(self, how="mean"):
+        """
+        Aggregate every full decade for all rows at once.
+        Returns ``(decade_starts, matrix)`` with one column per decade.
+        NaN cells are skipped; an all-NaN decade gives NaN.
+        """
+        first = -(-self.year0 // 10) * 10
+        n_dec = (int(self.years[-1]) + 1 - first) // 10
+        s = self._span(first, first + 10 * n_dec - 1)
+        block = self.values[:, s].reshape(len(self), n_dec, 10)
+        valid = ~self.mask[:, s].reshape(len(self), n_dec, 10)
+        sums = np.where(valid, block, 0.0).sum(axis=2)
+        counts = valid.sum(axis=2)
+        if how == "sum":
+            out = np.where(counts > 0, sums, np.nan)
+        elif how == "mean":
+            out = np.divide(sums, counts, out=np.full_like(sums, np.nan), where=counts > 0)
+        else:
+            raise ValueError(f"Unknown decade aggregate: {how!r}")
+        return np.arange(first, first + 10 * n_dec, 10), out
+
+
+def top_k(values, k, largest=True, where=None):
+    """
+    Indices of the ``k`` largest (or smallest) entries, best first, using
+    ``argpartition`` so only the selected entries are sorted. ``where``
+    restricts the candidates; NaN entries are never selected.
+    """
+    values = np.asarray(values, dtype=float)
+    ok = ~np.isnan(values)
+    if where is not None:
+        ok &= where
+    cand = np.flatnonzero(ok)
+    keyed = -values[cand] if largest else values[cand]
+    if len(cand) > k:
+        part = np.argpartition(keyed, k - 1)[:k]
+        cand, keyed = cand[part], keyed[part]
+    return cand[np.argsort(keyed, kind="stable")]
+
+
+def load_budget_matrix():
+    """Build the defence-budget matrix straight from the store (uncached)."""
+    df = load("defence_budget", columns=["Country Name", "iso3"] + BUDGET_YEARS)
+    return YearMatrix.from_wide(df, "Country Name", BUDGET_YEARS, code_col="iso3")
+
+
+@st.cache_resource(show_spinner=False)
+def _budget_matrix(version):
+    return load_budget_matrix()
+
+
+def budget_matrix():
+    """Shared defence-budget (% of GDP) matrix, rebuilt when the CSV changes."""
+    return _budget_matrix(source_version("defence_budget"))
+
+
+def load_expenditure_matrix(entity_type="Country"):
+    """
+    Military expenditure (current USD), 1960–2018 (uncached); countries by
+    default, every series of the workbook with ``entity_type=None``.
+    """
+    df = load_expenditure(indicator=EXPENDITURE_INDICATOR, entity_type=entity_type).reset_index()
+    return YearMatrix.from_wide(df, "Name", EXPENDITURE_YEARS, code_col="iso3")
+
+
+@st.cache_resource(show_spinner=False)
+def _expenditure_matrix(version):
+    return load_expenditure_matrix()
+
+
+def expenditure_matrix():
+    """Shared expenditure matrix, rebuilt when the workbook changes."""
+    return _expenditure_matrix(source_version("military_expenditure"))